@@ -16,6 +16,7 @@ setup(
         "requests",
         "beautifulsoup4",
         "lxml",
+        "numpy",
     ],
     author="Taylor VanCoevering",
 )
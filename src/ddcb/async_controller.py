@@ -0,0 +1,107 @@
+import asyncio
+import random
+import typing as t
+from typing import Optional
+
+from ddcb.base_controller import BaseController, ConfirmHandResponse, RandomController
+from ddcb.battle import Battle, BattleResult
+from ddcb.card import Attack, UnitCard
+from ddcb.field import Deck
+from ddcb.player import Player
+from ddcb.seeding import RNG
+
+
+def main():
+    battle = Battle(
+        Player("one", Deck.from_random(), BaseController()),
+        Player("two", Deck.from_random(), RandomController()),
+    )
+    controllers = [AsyncAdapter(p.controller) for p in battle.players]
+    result = asyncio.run(play(battle, controllers, timeout=1.0))
+    print(f"Result: player one {result.name} after {battle.turn} turns")
+
+
+class AsyncController:
+    # The awaitable counterpart of BaseController, for controllers that wait
+    # on something, like a player on the other end of a socket. The steps of
+    # Battle.STEPS call these by the same names, so `spec.ask` returns an
+    # awaitable when handed an AsyncController.
+    rng: RNG = random
+
+    def attach(self, battle: Battle, seat: int):
+        pass
+
+    async def confirm_hand(self) -> ConfirmHandResponse:
+        return ConfirmHandResponse.KEEP_HAND
+
+    async def choose_unit(self, units: list[UnitCard]) -> UnitCard:
+        return units[0]
+
+    async def choose_dp_booster(self, units: list[UnitCard]) -> Optional[UnitCard]:
+        return await self.choose_unit(units)
+
+    async def choose_evolution(self, units: list[UnitCard]) -> Optional[UnitCard]:
+        return await self.choose_unit(units)
+
+    async def choose_attack(self, attacks: list[Attack]) -> Attack:
+        return attacks[0]
+
+
+class AsyncAdapter(AsyncController):
+    # Any synchronous controller behind the async interface.
+    def __init__(self, controller: BaseController):
+        self.controller = controller
+
+    def attach(self, battle: Battle, seat: int):
+        self.controller.attach(battle, seat)
+
+    async def confirm_hand(self) -> ConfirmHandResponse:
+        return self.controller.confirm_hand()
+
+    async def choose_unit(self, units: list[UnitCard]) -> UnitCard:
+        return self.controller.choose_unit(units)
+
+    async def choose_dp_booster(self, units: list[UnitCard]) -> Optional[UnitCard]:
+        return self.controller.choose_dp_booster(units)
+
+    async def choose_evolution(self, units: list[UnitCard]) -> Optional[UnitCard]:
+        return self.controller.choose_evolution(units)
+
+    async def choose_attack(self, attacks: list[Attack]) -> Attack:
+        return self.controller.choose_attack(attacks)
+
+
+# answers a decision when its controller runs out of time
+TIMEOUT_CONTROLLER = BaseController()
+
+
+async def play(
+    battle: Battle,
+    controllers: t.Sequence[AsyncController],
+    timeout: t.Optional[float] = None,
+    first: t.Optional[int] = None,
+    on_timeout: t.Optional[t.Callable[[int], None]] = None,
+) -> BattleResult:
+    # Play one game of `battle`, asking `controllers` instead of the players'
+    # own. Only the decisions wait, the steps in between run synchronously
+    # like Battle.run(). A decision that takes longer than `timeout` is
+    # answered by TIMEOUT_CONTROLLER and reported to `on_timeout(seat)`.
+    for seat, controller in enumerate(controllers):
+        controller.attach(battle, seat)
+    battle.reset(first)
+    while (seat := battle.next_decision()) is not None:
+        ask = battle.STEPS[battle.step].ask
+        try:
+            choice = await asyncio.wait_for(
+                ask(controllers[seat], battle.options), timeout
+            )
+        except asyncio.TimeoutError:
+            if on_timeout is not None:
+                on_timeout(seat)
+            choice = ask(TIMEOUT_CONTROLLER, battle.options)
+        battle.decide(choice)
+    return battle.result
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
+import random
 from enum import Enum
 from typing import Optional
 
-from ddcb.card import CardList, UnitCard
+from ddcb.card import Attack, CardList, UnitCard
+from ddcb.seeding import RNG
 
 
 class ConfirmHandResponse(Enum):
@@ -10,6 +12,14 @@ class ConfirmHandResponse(Enum):
 
 
 class BaseController:
+    # replaced by a per-battle stream when the Battle is seeded
+    rng: RNG = random
+
+    def attach(self, battle, seat: int):
+        # called by the Battle this controller plays in, for controllers
+        # that need to look at the game state
+        pass
+
     def confirm_hand(self) -> ConfirmHandResponse:
         return ConfirmHandResponse.KEEP_HAND
 
@@ -21,3 +31,20 @@ class BaseController:
 
     def choose_evolution(self, units: list[UnitCard]) -> Optional[UnitCard]:
         return self.choose_unit(units)
+
+    def choose_attack(self, attacks: list[Attack]) -> Attack:
+        return attacks[0]
+
+
+class RandomController(BaseController):
+    def choose_unit(self, units: list[UnitCard]) -> UnitCard:
+        return self.rng.choice(units)
+
+    def choose_dp_booster(self, units: list[UnitCard]) -> Optional[UnitCard]:
+        return self.rng.choice(units + [None])
+
+    def choose_evolution(self, units: list[UnitCard]) -> Optional[UnitCard]:
+        return self.rng.choice(units + [None])
+
+    def choose_attack(self, attacks: list[Attack]) -> Attack:
+        return self.rng.choice(attacks)
@@ -0,0 +1,383 @@
+import argparse
+import time
+import typing as t
+
+import numpy as np
+
+from ddcb.base_controller import BaseController, RandomController
+from ddcb.battle import Battle, BattleResult
+from ddcb.card_table import CardTable
+from ddcb.field import MAX_HAND_SIZE, NO_CARD, Deck
+from ddcb.player import Player
+from ddcb.simulate import run_shard
+
+ONE, TWO = 0, 1
+
+
+def main():
+    args = parse_args()
+    decklists = [
+        Deck.from_json(path).decklist for path in (args.deck_one, args.deck_two)
+    ]
+    if args.check:
+        ok = check_against_scalar(*decklists, games=args.games, seed=args.seed)
+        raise SystemExit(0 if ok else 1)
+
+    table = CardTable.from_card_list()
+    batch = random_batch(table, args.seed)
+    start = time.perf_counter()
+    result = batch.battle(*[table.ids(d) for d in decklists], games=args.games)
+    seconds = time.perf_counter() - start
+    print(result.summary())
+    print(f"wall time: {seconds:.2f}s ({args.games / seconds:.0f} games/s)")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ddcb.batch_battle",
+        description="Run many battles at once in lockstep.",
+    )
+    parser.add_argument("deck_one", help="JSON decklist for player one")
+    parser.add_argument("deck_two", help="JSON decklist for player two")
+    parser.add_argument("-n", "--games", type=int, default=10000)
+    parser.add_argument("-s", "--seed", type=int, default=None)
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="compare outcomes against the scalar battle.Battle",
+    )
+    return parser.parse_args(argv)
+
+
+class VectorPolicy:
+    # Vectorized stand-in for base_controller.BaseController: given the
+    # number of options per game, return the index of the chosen option per
+    # game. Options are ordered like the scalar engine offers them (hand
+    # order, then None for optional choices; C, T, X for attacks).
+    def choose(self, counts: np.ndarray) -> np.ndarray:
+        return np.zeros(len(counts), dtype=np.intp)
+
+    def mulligan(self, games: int) -> np.ndarray:
+        return np.zeros(games, dtype=bool)
+
+
+class RandomVectorPolicy(VectorPolicy):
+    # Vectorized stand-in for base_controller.RandomController.
+    def __init__(self, seed=None):
+        self.rng = np.random.default_rng(seed)
+
+    def choose(self, counts: np.ndarray) -> np.ndarray:
+        return (self.rng.random(len(counts)) * counts).astype(np.intp)
+
+
+class BatchResult:
+    def __init__(self, results: np.ndarray, turns: np.ndarray):
+        self.results = results
+        self.turns = turns
+
+    @property
+    def wins(self):
+        return int((self.results == BattleResult.Win.value).sum())
+
+    @property
+    def losses(self):
+        return int((self.results == BattleResult.Loss.value).sum())
+
+    @property
+    def ties(self):
+        return int((self.results == BattleResult.Tie.value).sum())
+
+    def summary(self):
+        return (
+            f"games: {len(self.results)} "
+            f"wins: {self.wins} losses: {self.losses} ties: {self.ties} "
+            f"mean turns: {self.turns.mean():.2f}"
+        )
+
+
+class BatchBattle:
+    # Plays many independent games of the battle.Battle rules in lockstep.
+    # Every array has a leading (game, player) shape; decks are drawn from
+    # the end like Deck.draw, hands are kept in draw order like Field.hand.
+    def __init__(
+        self,
+        table: CardTable,
+        policies: t.Sequence[VectorPolicy] = (VectorPolicy(), VectorPolicy()),
+        rng: t.Optional[np.random.Generator] = None,
+    ):
+        self.policies = policies
+        self.rng = rng or np.random.default_rng()
+
+        # one extra row so NO_CARD (-1) looks up a blank card
+        self.is_unit = np.append(table.is_unit, False)
+        self.level = np.append(table.level, len(table.levels))
+        self.hp = np.append(table.hp, 0)
+        self.pp = np.append(table.pp, 0)
+        self.damage = np.append(
+            np.stack([table.c_damage, table.t_damage, table.x_damage], axis=1),
+            np.zeros((1, 3), dtype=table.c_damage.dtype),
+            axis=0,
+        )
+        # evolves[unit level, card level], the extra level is NO_CARD's
+        self.evolves = np.zeros((len(table.levels) + 1,) * 2, dtype=bool)
+        for level in table.levels:
+            for target in level.evolution_targets():
+                self.evolves[table.levels.index(level), table.levels.index(target)] = (
+                    True
+                )
+
+    def battle(
+        self,
+        deck_one: np.ndarray,
+        deck_two: np.ndarray,
+        games: int,
+        first: t.Optional[np.ndarray] = None,
+        shuffle=True,
+    ) -> BatchResult:
+        decks = np.empty((games, 2, len(deck_one)), dtype=np.int16)
+        decks[:, ONE] = deck_one
+        decks[:, TWO] = deck_two
+        if shuffle:
+            decks = self.rng.permuted(decks, axis=2)
+        if first is None:
+            # alternate who goes first, like simulate does
+            first = np.arange(games) % 2
+        return self.battle_decks(decks, first)
+
+    def battle_decks(self, decks: np.ndarray, first: np.ndarray) -> BatchResult:
+        games = len(decks)
+        self.deck = decks.astype(np.int16, copy=True)
+        self.deck_len = np.full((games, 2), decks.shape[2], dtype=np.intp)
+        self.hand = np.full((games, 2, MAX_HAND_SIZE + 1), NO_CARD, dtype=np.int16)
+        self.hand_len = np.zeros((games, 2), dtype=np.intp)
+        self.unit = np.full((games, 2), NO_CARD, dtype=np.int16)
+        self.unit_hp = np.zeros((games, 2), dtype=np.int32)
+        self.dp = np.zeros((games, 2), dtype=np.int32)
+        self.dp_count = np.zeros((games, 2), dtype=np.intp)
+
+        self.results = np.zeros(games, dtype=np.int8)
+        self.turns = np.zeros(games, dtype=np.intp)
+        active = np.asarray(first, dtype=np.intp).copy()
+        live = np.arange(games)
+
+        while len(live):
+            player = active[live]
+            self.turns[live] += 1
+            self.do_turn(live, player)
+
+            live = live[self.results[live] == 0]
+            active[live] = 1 - active[live]
+
+        return BatchResult(self.results, self.turns)
+
+    def do_turn(self, g: np.ndarray, p: np.ndarray):
+        self.do_prep_phase(g, p)
+        keep = self.results[g] == 0
+        g, p = g[keep], p[keep]
+        self.do_upgrade_phase(g, p)
+        self.do_battle_phase(g, p)
+
+    def do_prep_phase(self, g, p):
+        dg, dp = g, p
+        while len(dg):
+            self.draw_til_full(dg, dp)
+            has_units = self.is_unit[self.hand[dg, dp]].any(axis=1)
+            can_redraw = self.deck_len[dg, dp] > 0
+            # auto-mulligan without units, otherwise ask unless the deck is empty
+            mulligan = ~has_units & can_redraw
+            asked = has_units & can_redraw
+            mulligan[asked] = self.mulligan(dp[asked])
+            dg, dp = dg[mulligan], dp[mulligan]
+            self.discard_hand(dg, dp)
+
+        needs_unit = self.unit[g, p] == NO_CARD
+        g, p = g[needs_unit], p[needs_unit]
+        units = self.is_unit[self.hand[g, p]]
+        has_units = units.any(axis=1)
+        self.set_result(g[~has_units], p[~has_units], BattleResult.Loss)
+
+        g, p, units = g[has_units], p[has_units], units[has_units]
+        slots = self.choose_slot(p, units)
+        card = self.pop_from_hand(g, p, slots)
+        self.unit[g, p] = card
+        self.unit_hp[g, p] = self.hp[card]
+
+    def do_upgrade_phase(self, g, p):
+        units = self.is_unit[self.hand[g, p]]
+        counts = units.sum(axis=1)
+        has_units = counts > 0
+        g, p = g[has_units], p[has_units]
+        units, counts = units[has_units], counts[has_units]
+        # the last option is None, like RandomController.choose_dp_booster
+        ranks = self.choose(p, counts + 1)
+        boost = ranks < counts
+        bg, bp = g[boost], p[boost]
+        slots = self.slot_of_rank(units[boost], ranks[boost])
+        card = self.pop_from_hand(bg, bp, slots)
+        self.dp[bg, bp] += self.pp[card]
+        self.dp_count[bg, bp] += 1
+
+        self.do_evolve(g, p)
+
+    def do_evolve(self, g, p):
+        hand = self.hand[g, p]
+        targets = (
+            self.is_unit[hand]
+            & self.evolves[self.level[self.unit[g, p]][:, None], self.level[hand]]
+        )
+        counts = targets.sum(axis=1)
+        has_targets = counts > 0
+        g, p = g[has_targets], p[has_targets]
+        targets, counts = targets[has_targets], counts[has_targets]
+        ranks = self.choose(p, counts + 1)
+        evolve = ranks < counts
+        g, p = g[evolve], p[evolve]
+        slots = self.slot_of_rank(targets[evolve], ranks[evolve])
+        card = self.pop_from_hand(g, p, slots)
+        self.unit[g, p] = card
+        self.unit_hp[g, p] = np.maximum(self.hp[card], self.unit_hp[g, p])
+
+    def do_battle_phase(self, g, p):
+        o = 1 - p
+        engaged = self.unit[g, o] != NO_CARD
+        g, p, o = g[engaged], p[engaged], o[engaged]
+
+        three = np.full(len(g), 3)
+        own_attack = self.choose(p, three)
+        opp_attack = self.choose(o, three)
+        own_damage = self.damage[self.unit[g, p], own_attack]
+        opp_damage = self.damage[self.unit[g, o], opp_attack]
+
+        self.unit_hp[g, o] -= own_damage
+        countered = self.unit_hp[g, o] > 0
+        self.unit_hp[g[countered], p[countered]] -= opp_damage[countered]
+
+        own_defeated = self.unit_hp[g, p] <= 0
+        opp_defeated = self.unit_hp[g, o] <= 0
+        tie = own_defeated & opp_defeated
+        self.set_result(g[tie], p[tie], BattleResult.Tie)
+        loss = own_defeated & ~opp_defeated
+        self.set_result(g[loss], p[loss], BattleResult.Loss)
+        win = opp_defeated & ~own_defeated
+        self.set_result(g[win], p[win], BattleResult.Win)
+
+    def draw_til_full(self, g, p):
+        count = np.minimum(MAX_HAND_SIZE - self.hand_len[g, p], self.deck_len[g, p])
+        for k in range(MAX_HAND_SIZE):
+            drawing = count > k
+            dg, dp = g[drawing], p[drawing]
+            self.deck_len[dg, dp] -= 1
+            self.hand[dg, dp, self.hand_len[dg, dp]] = self.deck[
+                dg, dp, self.deck_len[dg, dp]
+            ]
+            self.hand_len[dg, dp] += 1
+
+    def discard_hand(self, g, p):
+        self.hand[g, p] = NO_CARD
+        self.hand_len[g, p] = 0
+
+    def pop_from_hand(self, g, p, slots):
+        card = self.hand[g, p, slots]
+        # shift the cards after the popped slot left, like list.pop
+        positions = np.arange(MAX_HAND_SIZE)
+        source = positions + (positions >= slots[:, None])
+        self.hand[g[:, None], p[:, None], positions] = self.hand[
+            g[:, None], p[:, None], source
+        ]
+        self.hand_len[g, p] -= 1
+        return card
+
+    def choose(self, players: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        ranks = np.empty(len(players), dtype=np.intp)
+        for player, policy in enumerate(self.policies):
+            mask = players == player
+            if mask.any():
+                ranks[mask] = policy.choose(counts[mask])
+        return ranks
+
+    def mulligan(self, players: np.ndarray) -> np.ndarray:
+        choices = np.zeros(len(players), dtype=bool)
+        for player, policy in enumerate(self.policies):
+            mask = players == player
+            if mask.any():
+                choices[mask] = policy.mulligan(int(mask.sum()))
+        return choices
+
+    def choose_slot(self, players: np.ndarray, options: np.ndarray) -> np.ndarray:
+        ranks = self.choose(players, options.sum(axis=1))
+        return self.slot_of_rank(options, ranks)
+
+    @staticmethod
+    def slot_of_rank(options: np.ndarray, ranks: np.ndarray) -> np.ndarray:
+        # position of the rank-th True in each row
+        return np.argmax(options & (options.cumsum(axis=1) == ranks[:, None] + 1), 1)
+
+    def set_result(self, g, p, result: BattleResult):
+        # results are stored from player one's point of view
+        self.results[g] = np.where(p == ONE, result.value, result.flip().value)
+
+
+def random_batch(table: CardTable, seed=None) -> BatchBattle:
+    # independent streams for both seats and the shuffles, one seed would
+    # correlate all three
+    one, two, shuffles = np.random.SeedSequence(seed).spawn(3)
+    return BatchBattle(
+        table,
+        [RandomVectorPolicy(one), RandomVectorPolicy(two)],
+        np.random.default_rng(shuffles),
+    )
+
+
+def check_against_scalar(
+    decklist_one: t.List[str], decklist_two: t.List[str], games=2000, seed=None
+):
+    table = CardTable.from_card_list()
+    ids = [table.ids(decklist_one), table.ids(decklist_two)]
+
+    # Deterministic controllers: replay the exact same shuffles on both engines
+    battle = Battle(
+        Player("one", Deck.from_names(decklist_one), BaseController()),
+        Player("two", Deck.from_names(decklist_two), BaseController()),
+    )
+    decks = np.empty((games, 2, Deck.SIZE), dtype=np.int16)
+    first = np.arange(games) % 2
+    scalar = np.empty(games, dtype=np.int8)
+    if seed is not None:
+        battle.seed(seed)
+    for game in range(games):
+        battle.reset(first=int(first[game]))
+        decks[game] = [[c.id for c in f.deck.cards] for f in battle.fields]
+        scalar[game] = battle.run().value
+    vector = BatchBattle(table).battle_decks(decks, first).results
+    mismatches = int((scalar != vector).sum())
+    print(f"base controllers: {mismatches} of {games} games differ")
+
+    # Random controllers: compare the outcome distributions
+    scalar_result = run_shard(
+        decklist_one, decklist_two, RandomController, 0, games, seed
+    )
+    batch = random_batch(table, seed)
+    vector_result = batch.battle(*ids, games=games)
+    print(
+        f"scalar: wins {scalar_result.wins} losses {scalar_result.losses} "
+        f"ties {scalar_result.ties}"
+    )
+    print(
+        f"vector: wins {vector_result.wins} losses {vector_result.losses} "
+        f"ties {vector_result.ties}"
+    )
+    z = two_proportion_z(
+        scalar_result.wins, scalar_result.games, vector_result.wins, games
+    )
+    print(f"win rate z-score: {z:.2f}")
+    return mismatches == 0 and abs(z) < 3
+
+
+def two_proportion_z(wins_a: int, n_a: int, wins_b: int, n_b: int) -> float:
+    pooled = (wins_a + wins_b) / (n_a + n_b)
+    se = np.sqrt(pooled * (1 - pooled) * (1 / n_a + 1 / n_b))
+    return float((wins_a / n_a - wins_b / n_b) / se) if se else 0.0
+
+
+if __name__ == "__main__":
+    main()
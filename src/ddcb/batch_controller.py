@@ -0,0 +1,197 @@
+import argparse
+import time
+import typing as t
+
+import numpy as np
+
+from ddcb.base_controller import BaseController, RandomController
+from ddcb.battle import Battle, Step, choice_index, decision_choices
+from ddcb.field import Deck
+from ddcb.player import Player
+from ddcb.seeding import derive_seed
+from ddcb.simulate import SimulationResult, run_shard
+
+
+def main():
+    args = parse_args()
+    decklists = [
+        Deck.from_json(path).decklist for path in (args.deck_one, args.deck_two)
+    ]
+    for name, games_per_second in bench(
+        *decklists, games=args.games, batch_size=args.batch_size, seed=args.seed
+    ).items():
+        print(f"{name:>28}: {games_per_second:.0f} games/s")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ddcb.batch_controller",
+        description=(
+            "Compare batched controller decisions with one call per decision."
+        ),
+    )
+    parser.add_argument("deck_one", help="JSON decklist for player one")
+    parser.add_argument("deck_two", help="JSON decklist for player two")
+    parser.add_argument("-n", "--games", type=int, default=5000)
+    parser.add_argument(
+        "-b", "--batch-size", type=int, default=256, help="games played at once"
+    )
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+class Decision(t.NamedTuple):
+    # A game parked at a decision. `battle` is for reading the state only,
+    # the answer is an index into `choices` (see decision_choices).
+    game: int
+    seat: int
+    step: Step
+    choices: list
+    battle: Battle
+
+
+class BatchController:
+    # Answers every pending decision of one seat in one call.
+    def choose(self, decisions: t.Sequence[Decision]) -> t.Sequence[int]:
+        return [0] * len(decisions)
+
+
+class RandomBatchController(BatchController):
+    # Batched stand-in for base_controller.RandomController: hands are kept,
+    # everything else is a uniform pick.
+    def __init__(self, seed=None):
+        self.rng = np.random.default_rng(seed)
+
+    def choose(self, decisions: t.Sequence[Decision]) -> t.Sequence[int]:
+        counts = np.fromiter(
+            (len(d.choices) if d.step != Step.CONFIRM_HAND else 1 for d in decisions),
+            np.intp,
+            len(decisions),
+        )
+        return (self.rng.random(len(counts)) * counts).astype(np.intp).tolist()
+
+
+class PerCallBatchController(BatchController):
+    # Asks each game's own player controller, one decision at a time, like
+    # Battle.run() would. Seeded games then play exactly as in simulate().
+    def choose(self, decisions: t.Sequence[Decision]) -> t.Sequence[int]:
+        indexes = []
+        for d in decisions:
+            battle = d.battle
+            ask = battle.STEPS[d.step].ask
+            choice = ask(battle.players[d.seat].controller, battle.options)
+            indexes.append(choice_index(d.choices, choice))
+        return indexes
+
+
+def run_batched(
+    decklist_one: t.List[str],
+    decklist_two: t.List[str],
+    controllers: t.Sequence[BatchController],
+    games: int = 1000,
+    batch_size: int = 256,
+    seed: t.Optional[int] = None,
+    first_game: int = 0,
+    controller: t.Type[BaseController] = BaseController,
+) -> SimulationResult:
+    # Keep up to `batch_size` games in flight. Each round runs every game to
+    # its next decision with Battle.next_decision(), so it is parked there,
+    # hands each seat's pending decisions to that seat's controller in one
+    # call, and resumes the games with decide(). Finished games make room
+    # for the next ones. Games are numbered and seeded like run_shard(), and
+    # `controller` is what the players themselves are given.
+    start = time.perf_counter()
+    result = SimulationResult()
+    battles = [
+        Battle(
+            Player("one", Deck.from_names(decklist_one), controller()),
+            Player("two", Deck.from_names(decklist_two), controller()),
+        )
+        for _ in range(min(batch_size, games))
+    ]
+    game_of: t.List[int] = [0] * len(battles)
+    next_game = first_game
+    end = first_game + games
+
+    def start_game(i: int) -> bool:
+        nonlocal next_game
+        if next_game == end:
+            return False
+        game_of[i] = game = next_game
+        next_game += 1
+        if seed is not None:
+            battles[i].seed(derive_seed(seed, game))
+        battles[i].reset(first=game % 2)
+        return True
+
+    running = [i for i in range(len(battles)) if start_game(i)]
+    while running:
+        pending: t.Tuple[t.List[Decision], t.List[Decision]] = ([], [])
+        still_running = []
+        for i in running:
+            battle = battles[i]
+            seat = battle.next_decision()
+            while seat is None:
+                result.add(battle.result)
+                if not start_game(i):
+                    break
+                seat = battle.next_decision()
+            if seat is None:
+                continue
+            choices = decision_choices(battle.step, battle.options)
+            pending[seat].append(
+                Decision(game_of[i], seat, battle.step, choices, battle)
+            )
+            still_running.append(i)
+        for seat, decisions in enumerate(pending):
+            if not decisions:
+                continue
+            for d, index in zip(decisions, controllers[seat].choose(decisions)):
+                d.battle.decide(d.choices[index])
+        running = still_running
+
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def bench(
+    decklist_one: t.List[str],
+    decklist_two: t.List[str],
+    games: int = 5000,
+    batch_size: int = 256,
+    seed: int = 0,
+) -> t.Dict[str, float]:
+    def timed(run: t.Callable[[], SimulationResult]) -> float:
+        start = time.perf_counter()
+        run()
+        return games / (time.perf_counter() - start)
+
+    per_call = PerCallBatchController()
+    batched = RandomBatchController(seed)
+    return {
+        "per call, Battle.run": timed(
+            lambda: run_shard(
+                decklist_one, decklist_two, RandomController, 0, games, seed
+            )
+        ),
+        "per call, parked games": timed(
+            lambda: run_batched(
+                decklist_one,
+                decklist_two,
+                [per_call, per_call],
+                games,
+                batch_size,
+                seed,
+                controller=RandomController,
+            )
+        ),
+        "batched": timed(
+            lambda: run_batched(
+                decklist_one, decklist_two, [batched, batched], games, batch_size, seed
+            )
+        ),
+    }
+
+
+if __name__ == "__main__":
+    main()
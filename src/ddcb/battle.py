@@ -1,209 +1,38 @@
 import random
 import typing as t
-from enum import Enum
+from enum import Enum, IntEnum
 
-from ddcb import PKG_DATA
+from ddcb.base_controller import BaseController, ConfirmHandResponse, RandomController
+from ddcb import events
 from ddcb.card import Attack
-from ddcb.field import Deck, Field
+from ddcb.events import EventBus
+from ddcb.field import MAX_HAND_SIZE, Deck, FieldState
+from ddcb.player import Player
+from ddcb.seeding import RNG, derive_seed
 
-T = t.TypeVar("T")
+# bump when a rule change makes old simulation results incomparable
+ENGINE_VERSION = 2
+NO_ATTACK = -1
+# seed() derives one stream per consumer, so a controller drawing more or
+# fewer numbers can't shift the other player's shuffles
+RNG_STREAMS = 5  # turn order, deck one, deck two, controller one, controller two
 
 
 def main():
-    player_one = Battler(
+    player_one = Player(
         name="Yugi",
-        field=Field(Deck.from_random()),
+        deck=Deck.from_random(),
         controller=BaseController(),
     )
-    player_two = Battler(
+    player_two = Player(
         name="Kaiba",
-        field=Field(deck=Deck.from_random()),
-        controller=BaseController(),
+        deck=Deck.from_random(),
+        controller=RandomController(),
     )
-    result = player_one.battle(player_two)
-    print(f"Result: {player_one.name} {result.name}")
-
-
-class Battler:
-    def __init__(self, name: str, field: Field, controller: "BaseController"):
-        self.name = name
-        self.field = field
-        self.controller = controller
-
-    def battle(self, opponent: "Battler", has_first_turn=True) -> "BattleResult":
-        self._setup_field()
-        opponent._setup_field()
-
-        return self._battle_loop(opponent, has_first_turn)
-
-    def _setup_field(self):
-        self.field.reset()
-        self.field.deck.shuffle()
-
-    def _battle_loop(self, opponent: "Battler", is_own_turn: bool) -> "BattleResult":
-        while True:
-            if is_own_turn:
-                result = self.do_turn(opponent)
-                if result is not None:
-                    return result
-            else:
-                result = opponent.do_turn(self)
-                if result is not None:
-                    return result.flip()
-
-            is_own_turn = not is_own_turn
-
-    def do_turn(self, opponent: "Battler") -> t.Optional["BattleResult"]:
-        for phase in (self.do_prep_phase, self.do_upgrade_phase):
-            result = phase() or None
-            if result is not None:
-                return result
-
-        result = self.do_battle_phase(opponent)
-        return result
-
-    def do_prep_phase(self):
-        # Prep Phase
-        while True:
-            # - Draw Cards:hand fills to 4
-            # likely need to catch a deck empty exception here
-            self._draw_til_full()
-
-            #   > (Confirm: next / Mulligan:new cards)
-            # if self._confirm_draw():
-            if self.controller.prep_confirm_draw():
-                break
-            else:
-                self._discard_hand()
-
-        # - Play Unit, if no unit
-        #   > (choose unit from hand):if no unit, loss
-        if not self._has_unit():
-            self._play_unit()
-
-    def do_upgrade_phase(self):
-        # Upgrade Phase
-
-        self._boost_dp()
-        # - Play Upgrade [opt]
-        #   > (choose upgrade card from hand to play)
-        pass
-
-    def do_battle_phase(self, opponent: "Battler") -> t.Optional["BattleResult"]:
-        print("---")
-        if not opponent._has_unit():
-            return None
-
-        # Battle Phase, if opponent has an active unit
-        # - Player choose attack (o, t, x) AND opponent choose attack (o, t, x)
-        battler_attack = self._choose_attack()
-        opponent_attack = opponent._choose_attack()
-
-        # - Opponent choose support (card from hand OR top deck) [opt]
-        # - Player choose support (card from hand OR top deck) [opt]
-        # opponent_support = opponent._choose_card_or_gamble_opt()
-        # battler_support = self._choose_card_or_gamble_opt()
-        opponent_support = opponent.controller.battle_choose_support_or_gamble()
-        battler_support = self.controller.battle_choose_support_or_gamble()
-
-        # - Apply player support
-        # - Apply opponent support
-        pass
-
-        print(f"own {self.field.unit.name} hp: {self.get_hp()}")
-        print(f"opp {opponent.field.unit.name} hp: {opponent.get_hp()}")
-        # - Apply player damage
-        print(f"own {self.field.unit.name} attack: {battler_attack}")
-        self._do_attack(battler_attack, opponent)
-        print(f"opp {opponent.field.unit.name} hp: {opponent.get_hp()}")
-
-        # - Apply opp damage
-        if not opponent.unit_is_defeated():
-            print(f"opponent attack: {opponent_attack}")
-            opponent._do_attack(opponent_attack, self)
-            print(f"own hp: {self.get_hp()}")
-
-        if self.unit_is_defeated() and opponent.unit_is_defeated():
-            print(
-                f"Tie - own hp: {self.get_hp()} - is defeated: {self.unit_is_defeated()}"
-            )
-            print(
-                f"Tie - opp hp: {opponent.get_hp()} - is defeated: {opponent.unit_is_defeated()}"
-            )
-            return BattleResult.Tie
-        elif self.unit_is_defeated():
-            return BattleResult.Loss
-        elif opponent.unit_is_defeated():
-            return BattleResult.Win
-        else:
-            return None
-
-    @staticmethod
-    def _do_attack(attack: Attack, opponent: "Battler"):
-        opponent.set_hp(opponent.get_hp() - attack.damage)
-
-    def _draw_til_full(self):
-        self.field.draw(4 - len(self.field.hand))
-
-    def _confirm_draw(self):
-        choice = self._choose(["keep hand", "mulligan"])
-        return choice == "keep hand"
-
-    def _discard_hand(self):
-        self.field.discard_hand()
-
-    def _has_unit(self):
-        return self.field.has_unit()
-
-    def _play_unit(self):
-        units = self.field.get_units_in_hand()
-        if units:
-            unit_name = self._choose(units).name
-            self.field.play_unit(unit_name)
-        else:
-            raise Exception("Battler can't play a UNIT!")
-
-    def _boost_dp(self):
-        # - Boost DP [opt]
-        #   > (choose unit from hand to add to DPStack)
-        units = self.field.get_units_in_hand()
-        if units:
-            choice = self._choose_opt(units)
-            if isinstance(choice, str) or choice is None:
-                unit_name = choice
-            else:
-                unit_name = choice.name
-            # unit_name = self._choose_opt(units)
-            if unit_name:
-                self.field.boost_dp(unit_name)
-
-    def _choose(self, options: t.Sequence[T]) -> T:
-        return self.controller.choose(options)
-
-    def _choose_opt(self, options: t.Sequence[T]) -> T:
-        options = list(options)
-        options.append(None)
-        return self._choose(options)
-
-    def _choose_attack(self):
-        unit = self.field.unit
-        if not unit:
-            raise Exception()
-        options: t.List[Attack] = [
-            unit.c_attack,
-            unit.t_attack,
-            unit.x_attack,
-        ]
-        return self._choose(options)
-
-    def get_hp(self):
-        return self.field.unit.hp
-
-    def set_hp(self, value: int):
-        self.field.unit.hp = value
-
-    def unit_is_defeated(self):
-        return self.get_hp() <= 0
+    battle = Battle(player_one, player_two)
+    battle.events.subscribe(events.print_event)
+    result = battle.battle()
+    print(f"Result: {player_one.name} {result.name} after {battle.turn} turns")
 
 
 class BattleResult(Enum):
@@ -212,33 +41,428 @@ class BattleResult(Enum):
     Tie = 3
 
     def flip(self):
-        if self.value == BattleResult.Win:
+        if self == BattleResult.Win:
             return BattleResult.Loss
-        if self.value == BattleResult.Loss:
+        if self == BattleResult.Loss:
             return BattleResult.Win
-        if self.value == BattleResult.Tie:
-            return BattleResult.Tie
         return self
 
 
-class BaseController:
-    @staticmethod
-    def prep_confirm_draw() -> bool:
-        return True
-
-    @staticmethod
-    def battle_choose_support_or_gamble() -> dict:
-        return {"gamble": True}
-
-    @staticmethod
-    def choose(options: t.Sequence[T]) -> T:
-        return options[0]
+class Step(IntEnum):
+    # Prep Phase
+    DRAW = 0
+    CONFIRM_HAND = 1
+    PLAY_UNIT = 2
+    # Upgrade Phase
+    BOOST_DP = 3
+    EVOLVE = 4
+    # Battle Phase
+    ATTACK = 5
+    COUNTER = 6
+    RESOLVE = 7
+    END_TURN = 8
+
+
+class Battle:
+    # A table driven state machine over the steps of a turn. Each step has an
+    # entry in STEPS: automatic steps only have `run`, decision steps also
+    # name who decides and how the controller is asked. `run` returns the
+    # next step, or None when a decision is pending, in which case
+    # `self.options` holds what the controller chooses from and `decide`
+    # applies the choice and returns the next step.
+    STEPS: t.ClassVar[t.Tuple["StepSpec", ...]]
+
+    def __init__(
+        self,
+        player_one: Player,
+        player_two: Player,
+        bus: t.Optional[EventBus] = None,
+    ):
+        self.players = (player_one, player_two)
+        self.fields = (player_one.field, player_two.field)
+        for seat, player in enumerate(self.players):
+            player.controller.attach(self, seat)
+
+        self.step = Step.DRAW
+        self.active = 0
+        self.turn = 0
+        self.result: t.Optional[BattleResult] = None
+
+        self.pending = False
+        self.options: t.Optional[list] = None
+        self.attack_options: t.List[t.List[Attack]] = [[], []]
+        self.attacks: t.List[t.Optional[Attack]] = [None, None]
+
+        self.rng: RNG = random
+        self.rngs: t.List[random.Random] = []
+        self.events = bus or EventBus()
+
+    def battle(
+        self, first: t.Optional[int] = None, seed: t.Optional[int] = None
+    ) -> BattleResult:
+        if seed is not None:
+            self.seed(seed)
+        self.reset(first)
+        return self.run()
+
+    def seed(self, seed: int):
+        # Give the battle, both decks and both controllers their own stream
+        # derived from `seed`. The next reset() and run() then play the same
+        # game in any process.
+        if not self.rngs:
+            self.rngs = [random.Random() for _ in range(RNG_STREAMS)]
+        for stream, rng in enumerate(self.rngs):
+            rng.seed(derive_seed(seed, stream))
+        self.rng = self.rngs[0]
+        for seat, player in enumerate(self.players):
+            player.field.deck.rng = self.rngs[1 + seat]
+            player.controller.rng = self.rngs[3 + seat]
+
+    def reset(self, first: t.Optional[int] = None):
+        for field in self.fields:
+            field.reset()
+            field.deck.shuffle()
+
+        self.step = Step.DRAW
+        self.active = self.rng.randrange(2) if first is None else first
+        self.turn = 1
+        self.result = None
+        self.pending = False
+        self.options = None
+        self.attacks[:] = (None, None)
+
+    def run(self) -> BattleResult:
+        # advance() inlined, this is the hot loop of every simulation
+        steps = self.STEPS
+        while self.result is None:
+            spec = steps[self.step]
+            next_step = spec.run(self)
+            if next_step is None:
+                decider = self.players[self.active ^ spec.decider]
+                next_step = spec.decide(
+                    self, spec.ask(decider.controller, self.options)
+                )
+            self.step = next_step
+        return self.result
+
+    def next_decision(self) -> t.Optional[int]:
+        # Run automatic steps until a decision is pending, then return the
+        # deciding seat; None once the battle is over. Answer with decide().
+        steps = self.STEPS
+        while self.result is None:
+            spec = steps[self.step]
+            if self.pending:
+                return self.active ^ spec.decider
+            next_step = spec.run(self)
+            if next_step is None:
+                self.pending = True
+            else:
+                self.step = next_step
+        return None
 
+    def decide(self, choice):
+        self.step = self.STEPS[self.step].decide(self, choice)
+        self.pending = False
 
-class RandomController(BaseController):
-    @staticmethod
-    def choose(options: t.Sequence[str]):
-        return random.choice(options)
+    def advance(self) -> t.Optional[BattleResult]:
+        spec = self.STEPS[self.step]
+        if self.pending:
+            self.decide(spec.ask(self.decider().controller, self.options))
+        else:
+            next_step = spec.run(self)
+            if next_step is None:
+                self.pending = True
+            else:
+                self.step = next_step
+        return self.result
+
+    def snapshot(self) -> "BattleState":
+        return BattleState(
+            one=self.fields[0].snapshot(),
+            two=self.fields[1].snapshot(),
+            step=self.step,
+            active=self.active,
+            turn=self.turn,
+            result=self.result.value if self.result else 0,
+            pending=self.pending,
+            attack=self._attack_slot(self.active, self.attacks[0]),
+            counter=self._attack_slot(1 - self.active, self.attacks[1]),
+        )
+
+    def restore(self, state: "BattleState"):
+        self.fields[0].restore(state.one)
+        self.fields[1].restore(state.two)
+        self.step = Step(state.step)
+        self.active = state.active
+        self.turn = state.turn
+        self.result = BattleResult(state.result) if state.result else None
+        self.attacks[0] = self._attack_at(self.active, state.attack)
+        self.attacks[1] = self._attack_at(1 - self.active, state.counter)
+
+        self.pending = state.pending
+        self.options = None
+        if self.pending:
+            # publishing a pending decision's options has no side effects
+            self.STEPS[self.step].run(self)
+
+    def _attack_slot(self, player: int, attack: t.Optional[Attack]):
+        unit = self.fields[player].unit
+        if attack is None or unit is None:
+            return NO_ATTACK
+        for slot, option in enumerate(self._attack_options(player)):
+            if option is attack:
+                return slot
+        return NO_ATTACK
+
+    def _attack_at(self, player: int, slot: int):
+        if slot == NO_ATTACK:
+            return None
+        return self._attack_options(player)[slot]
+
+    def decider(self) -> Player:
+        return self.players[self.active ^ self.STEPS[self.step].decider]
+
+    @property
+    def player(self) -> Player:
+        return self.players[self.active]
+
+    @property
+    def opponent(self) -> Player:
+        return self.players[1 - self.active]
+
+    def finish(self, result: BattleResult):
+        # result is from the active player's point of view
+        self.result = result if self.active == 0 else result.flip()
+        if self.events.listening:
+            self.events.emit(events.Result(self.turn, self.result))
+        return Step.END_TURN
+
+    # Prep Phase
+    def run_draw(self):
+        field = self.fields[self.active]
+        drawn = field.draw_til_full()
+        if self.events.listening:
+            requested = MAX_HAND_SIZE - len(field.hand) + drawn
+            cards = tuple(field.hand[len(field.hand) - drawn :])
+            self.events.emit(events.Draw(self.turn, self.active, cards, requested))
+        return Step.CONFIRM_HAND
+
+    def run_confirm_hand(self):
+        field = self.fields[self.active]
+        if not field.has_unit_in_hand():
+            if field.deck.is_empty():
+                return Step.PLAY_UNIT
+            # Auto-mulligan
+            self._mulligan(auto=True)
+            return Step.DRAW
+        if field.deck.is_empty():
+            # Auto-confirm, there is nothing left to mulligan into
+            return Step.PLAY_UNIT
+        self.options = None
+        return None
+
+    def decide_confirm_hand(self, choice: ConfirmHandResponse):
+        if choice == ConfirmHandResponse.MULLIGAN:
+            self._mulligan(auto=False)
+            return Step.DRAW
+        return Step.PLAY_UNIT
+
+    def _mulligan(self, auto: bool):
+        field = self.fields[self.active]
+        if self.events.listening:
+            cards = tuple(field.hand)
+            self.events.emit(events.Mulligan(self.turn, self.active, cards, auto))
+        field.discard_hand()
+
+    def run_play_unit(self):
+        field = self.fields[self.active]
+        if field.has_unit():
+            return Step.BOOST_DP
+        if not field.has_unit_in_hand():
+            return self.finish(BattleResult.Loss)
+        # the hand's live unit index, controllers only read it
+        self.options = field.hand_units
+        return None
+
+    def decide_play_unit(self, choice):
+        self.fields[self.active].play_unit(choice)
+        if self.events.listening:
+            card = self.fields[self.active].unit.card
+            self.events.emit(events.Play(self.turn, self.active, card))
+        return Step.BOOST_DP
+
+    # Upgrade Phase
+    def run_boost_dp(self):
+        if not self.fields[self.active].has_unit_in_hand():
+            return Step.EVOLVE
+        self.options = self.fields[self.active].hand_units
+        return None
+
+    def decide_boost_dp(self, choice):
+        if choice is not None:
+            field = self.fields[self.active]
+            field.boost_dp(choice)
+            if self.events.listening:
+                dp = field.dp.get_value()
+                card = field.dp.peek()
+                self.events.emit(events.Boost(self.turn, self.active, card, dp))
+        return Step.EVOLVE
+
+    def run_evolve(self):
+        targets = self.fields[self.active].get_evolution_targets()
+        if not targets:
+            return Step.ATTACK
+        self.options = targets
+        return None
+
+    def decide_evolve(self, choice):
+        if choice is not None:
+            field = self.fields[self.active]
+            field.evolve_unit(choice)
+            if self.events.listening:
+                card, previous = field.unit.card, field.discard_pile[-1]
+                self.events.emit(events.Evolve(self.turn, self.active, card, previous))
+        return Step.ATTACK
+
+    # Battle Phase
+    def run_attack(self):
+        if not self.fields[1 - self.active].has_unit():
+            return Step.END_TURN
+        self.options = self._attack_options(self.active)
+        return None
+
+    def decide_attack(self, choice: Attack):
+        self.attacks[0] = choice
+        if self.events.listening:
+            attack = events.AttackChosen(self.turn, self.active, choice, False)
+            self.events.emit(attack)
+        return Step.COUNTER
+
+    def run_counter(self):
+        self.options = self._attack_options(1 - self.active)
+        return None
+
+    def decide_counter(self, choice: Attack):
+        self.attacks[1] = choice
+        if self.events.listening:
+            counter = events.AttackChosen(self.turn, 1 - self.active, choice, True)
+            self.events.emit(counter)
+        return Step.RESOLVE
+
+    def run_resolve(self):
+        own, opp = self.fields[self.active].unit, self.fields[1 - self.active].unit
+        listening = self.events.listening
+        opp.hp -= self.attacks[0].damage
+        if listening:
+            damage = self.attacks[0].damage
+            self.events.emit(events.Damage(self.turn, 1 - self.active, damage, opp.hp))
+        if opp.hp > 0:
+            own.hp -= self.attacks[1].damage
+            if listening:
+                damage = self.attacks[1].damage
+                self.events.emit(events.Damage(self.turn, self.active, damage, own.hp))
+
+        if own.hp <= 0 and opp.hp <= 0:
+            return self.finish(BattleResult.Tie)
+        elif own.hp <= 0:
+            return self.finish(BattleResult.Loss)
+        elif opp.hp <= 0:
+            return self.finish(BattleResult.Win)
+        return Step.END_TURN
+
+    def run_end_turn(self):
+        self.attacks[:] = (None, None)
+        self.active = 1 - self.active
+        self.turn += 1
+        return Step.DRAW
+
+    def _attack_options(self, player: int):
+        card = self.fields[player].unit.card
+        options = self.attack_options[player]
+        options[:] = (card.c_attack, card.t_attack, card.x_attack)
+        return options
+
+
+class BattleState(t.NamedTuple):
+    # Hashable copy of a Battle, see FieldState. Attacks are stored as
+    # C/T/X slots of the attacking and countering units.
+    one: FieldState
+    two: FieldState
+    step: int
+    active: int
+    turn: int
+    result: int
+    pending: bool
+    attack: int
+    counter: int
+
+
+class StepSpec(t.NamedTuple):
+    run: t.Callable[[Battle], t.Optional[Step]]
+    decide: t.Optional[t.Callable[[Battle, t.Any], Step]] = None
+    ask: t.Optional[t.Callable[[BaseController, t.Any], t.Any]] = None
+    # 0 when the active player decides, 1 for the opponent
+    decider: int = 0
+
+
+Battle.STEPS = (
+    StepSpec(Battle.run_draw),
+    StepSpec(
+        Battle.run_confirm_hand,
+        Battle.decide_confirm_hand,
+        lambda controller, _: controller.confirm_hand(),
+    ),
+    StepSpec(
+        Battle.run_play_unit,
+        Battle.decide_play_unit,
+        lambda controller, units: controller.choose_unit(units),
+    ),
+    StepSpec(
+        Battle.run_boost_dp,
+        Battle.decide_boost_dp,
+        lambda controller, units: controller.choose_dp_booster(units),
+    ),
+    StepSpec(
+        Battle.run_evolve,
+        Battle.decide_evolve,
+        lambda controller, units: controller.choose_evolution(units),
+    ),
+    StepSpec(
+        Battle.run_attack,
+        Battle.decide_attack,
+        lambda controller, attacks: controller.choose_attack(attacks),
+    ),
+    StepSpec(
+        Battle.run_counter,
+        Battle.decide_counter,
+        lambda controller, attacks: controller.choose_attack(attacks),
+        decider=1,
+    ),
+    StepSpec(Battle.run_resolve),
+    StepSpec(Battle.run_end_turn),
+)
+
+# steps where passing (None) is one of the choices
+OPTIONAL_STEPS = (Step.BOOST_DP, Step.EVOLVE)
+CONFIRM_CHOICES = [ConfirmHandResponse.KEEP_HAND, ConfirmHandResponse.MULLIGAN]
+
+
+def decision_choices(step: Step, options: t.Optional[list]) -> list:
+    # everything a controller may answer at a decision step, in a fixed order
+    if step == Step.CONFIRM_HAND:
+        return CONFIRM_CHOICES
+    if step in OPTIONAL_STEPS:
+        return list(options) + [None]
+    return list(options)
+
+
+def choice_index(choices: list, choice) -> int:
+    # where an answer sits in decision_choices(); by identity first, equal
+    # cards or attacks may sit in several slots
+    for i, option in enumerate(choices):
+        if option is choice:
+            return i
+    return choices.index(choice)
 
 
 if __name__ == "__main__":
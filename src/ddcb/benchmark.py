@@ -0,0 +1,406 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import typing as t
+from pathlib import Path
+
+from ddcb.base_controller import BaseController, RandomController
+from ddcb.battle import ENGINE_VERSION, Battle
+from ddcb.card import DEF_CARD_LIST_FILE, CardFactory, CardList, Level, UnitCard
+from ddcb.field import Deck, Field
+from ddcb.player import Player
+from ddcb.seeding import derive_seed
+
+RESULTS_VERSION = 1
+# a benchmark regresses when it is this much slower than the baseline,
+# unless the baseline sets its own "threshold"
+DEF_THRESHOLD = 0.15
+
+
+def main():
+    args = parse_args()
+    rng = random.Random(args.seed)
+    decklists = [
+        Deck.from_json(path).decklist if path else Deck.from_random(rng).decklist
+        for path in (args.deck_one, args.deck_two)
+    ]
+    names = args.only or list(BENCHMARKS)
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        raise SystemExit(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    results = run_suite(
+        names, Setup(decklists, args.games, args.seed), repeat=args.repeat
+    )
+    baseline = load_results(args.baseline) if args.baseline else None
+    regressions = compare(results, baseline, args.threshold)
+    print_results(results, baseline, regressions)
+    if args.out:
+        write_results(results, args.out)
+        print(f"results in {args.out}")
+    if regressions:
+        raise SystemExit(1)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ddcb.benchmark",
+        description=(
+            "Measure card loading, deck, field and battle engine throughput, "
+            "optionally against a saved baseline."
+        ),
+    )
+    parser.add_argument("deck_one", nargs="?", help="defaults to a random deck")
+    parser.add_argument("deck_two", nargs="?", help="defaults to a random deck")
+    parser.add_argument(
+        "-n", "--games", type=int, default=2000, help="games per battle benchmark"
+    )
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=3, help="runs per benchmark, best kept"
+    )
+    parser.add_argument(
+        "--only", nargs="+", metavar="NAME", help=f"any of {', '.join(BENCHMARKS)}"
+    )
+    parser.add_argument("-o", "--out", type=Path, help="write results as JSON")
+    parser.add_argument("-b", "--baseline", type=Path, help="JSON results to compare")
+    parser.add_argument(
+        "-t",
+        "--threshold",
+        type=float,
+        default=DEF_THRESHOLD,
+        help="slowdown counted as a regression, e.g. 0.15 for 15%%",
+    )
+    return parser.parse_args(argv)
+
+
+class Setup(t.NamedTuple):
+    decklists: t.List[t.List[str]]
+    games: int
+    seed: int
+
+
+# Every benchmark returns (operations, seconds) for what it timed. Set up
+# that isn't the operation itself, like resetting a field before a draw,
+# stays outside the timed sections.
+Benchmark = t.Callable[[Setup], t.Tuple[int, float]]
+
+
+def bench_card_json(setup: Setup, loads=20) -> t.Tuple[int, float]:
+    start = time.perf_counter()
+    for _ in range(loads):
+        list(CardFactory.from_json(DEF_CARD_LIST_FILE))
+    return loads, time.perf_counter() - start
+
+
+def bench_card_list(setup: Setup, loads=20) -> t.Tuple[int, float]:
+    # a fresh instance each time, the singleton is left alone
+    start = time.perf_counter()
+    for _ in range(loads):
+        object.__new__(CardList).load_from_path(DEF_CARD_LIST_FILE)
+    return loads, time.perf_counter() - start
+
+
+def bench_deck_from_random(setup: Setup, decks=2000) -> t.Tuple[int, float]:
+    rng = random.Random(setup.seed)
+    start = time.perf_counter()
+    for _ in range(decks):
+        Deck.from_random(rng)
+    return decks, time.perf_counter() - start
+
+
+def bench_deck_reset(setup: Setup, resets=200_000) -> t.Tuple[int, float]:
+    deck = Deck.from_names(setup.decklists[0])
+    start = time.perf_counter()
+    for _ in range(resets):
+        deck.reset()
+    return resets, time.perf_counter() - start
+
+
+def bench_deck_shuffle(setup: Setup, shuffles=50_000) -> t.Tuple[int, float]:
+    deck = Deck.from_names(setup.decklists[0], random.Random(setup.seed))
+    start = time.perf_counter()
+    for _ in range(shuffles):
+        deck.shuffle()
+    return shuffles, time.perf_counter() - start
+
+
+def bench_field_draw(setup: Setup, hands=50_000) -> t.Tuple[int, float]:
+    field = Field(Deck.from_names(setup.decklists[0], random.Random(setup.seed)))
+    seconds = 0.0
+    perf_counter = time.perf_counter
+    for _ in range(hands):
+        field.reset()
+        field.deck.shuffle()
+        start = perf_counter()
+        field.draw_til_full()
+        seconds += perf_counter() - start
+    return hands, seconds
+
+
+def bench_field_play_unit(setup: Setup, plays=50_000) -> t.Tuple[int, float]:
+    field, units = _unit_field(setup)
+    seconds = 0.0
+    perf_counter = time.perf_counter
+    for i in range(plays):
+        field.set_hand(units)
+        field.unit = None
+        start = perf_counter()
+        field.play_unit(units[i % len(units)])
+        seconds += perf_counter() - start
+    return plays, seconds
+
+
+def bench_field_boost_dp(setup: Setup, boosts=50_000) -> t.Tuple[int, float]:
+    field, units = _unit_field(setup)
+    seconds = 0.0
+    perf_counter = time.perf_counter
+    for i in range(boosts):
+        field.set_hand(units)
+        field.dp.clear()
+        start = perf_counter()
+        field.boost_dp(units[i % len(units)])
+        seconds += perf_counter() - start
+    return boosts, seconds
+
+
+def bench_field_evolve_unit(setup: Setup, evolutions=50_000) -> t.Tuple[int, float]:
+    field, _ = _unit_field(setup)
+    rookie = next(u for u in _all_units() if u.level == Level.ROOKIE)
+    champions = [u for u in _all_units() if u.level == Level.CHAMPION][:4]
+    seconds = 0.0
+    perf_counter = time.perf_counter
+    for i in range(evolutions):
+        field.set_hand(champions)
+        field.unit = field._unit.bind(rookie)
+        start = perf_counter()
+        field.evolve_unit(champions[i % len(champions)])
+        seconds += perf_counter() - start
+        field.discard_pile.clear()
+    return evolutions, seconds
+
+
+def _unit_field(setup: Setup) -> t.Tuple[Field, t.List[UnitCard]]:
+    # a field and a hand of units from the first deck, topped up from the
+    # card list for decks with fewer than four
+    deck = Deck.from_names(setup.decklists[0])
+    units = [c for c in deck.template if isinstance(c, UnitCard)]
+    return Field(deck), (units + _all_units())[:4]
+
+
+def _all_units() -> t.List[UnitCard]:
+    return [c for c in CardList().cards.values() if isinstance(c, UnitCard)]
+
+
+def bench_battle_games(setup: Setup) -> t.Tuple[int, float]:
+    # whole seeded games, resets and shuffles included
+    battle = _battle(setup)
+    start = time.perf_counter()
+    for game in range(setup.games):
+        battle.battle(first=game % 2, seed=derive_seed(setup.seed, game))
+    return setup.games, time.perf_counter() - start
+
+
+def bench_battle_turns(setup: Setup) -> t.Tuple[int, float]:
+    # benchmarks/battler.json is the engine before battle.Battle, timed the
+    # same way on the default decks; compare with -b benchmarks/battler.json
+    stats = bench_turns(*setup.decklists, games=setup.games, seed=setup.seed)
+    return stats["turns"], stats["loop_seconds"]
+
+
+def bench_hand_query(setup: Setup) -> t.Tuple[int, float]:
+    stats = bench_hand_queries(setup.decklists[0], seed=setup.seed)
+    return stats["queries"], stats["seconds"]
+
+
+def _battle(
+    setup: Setup, controller: t.Type[BaseController] = RandomController
+) -> Battle:
+    one, two = setup.decklists
+    return Battle(
+        Player("one", Deck.from_names(one), controller()),
+        Player("two", Deck.from_names(two), controller()),
+    )
+
+
+BENCHMARKS: t.Dict[str, Benchmark] = {
+    "card_json": bench_card_json,
+    "card_list": bench_card_list,
+    "deck_from_random": bench_deck_from_random,
+    "deck_reset": bench_deck_reset,
+    "deck_shuffle": bench_deck_shuffle,
+    "field_draw": bench_field_draw,
+    "field_play_unit": bench_field_play_unit,
+    "field_boost_dp": bench_field_boost_dp,
+    "field_evolve_unit": bench_field_evolve_unit,
+    "battle_games": bench_battle_games,
+    "battle_turns": bench_battle_turns,
+    "hand_queries": bench_hand_query,
+}
+
+
+def run_suite(
+    names: t.Iterable[str], setup: Setup, repeat: int = 3
+) -> t.Dict[str, t.Dict[str, float]]:
+    # best of `repeat` runs, the least disturbed by the rest of the machine
+    results = {}
+    for name in names:
+        best = None
+        for _ in range(repeat):
+            ops, seconds = BENCHMARKS[name](setup)
+            if ops and (best is None or seconds / ops < best[1] / best[0]):
+                best = (ops, seconds)
+        if best is None:
+            continue
+        ops, seconds = best
+        results[name] = {
+            "ops": ops,
+            "seconds": seconds,
+            "ops_per_second": ops / seconds,
+        }
+    return results
+
+
+def write_results(results: t.Dict[str, t.Dict[str, float]], path: Path):
+    data = {
+        "version": RESULTS_VERSION,
+        "engine": ENGINE_VERSION,
+        "python": sys.version.split()[0],
+        "machine": platform.machine(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "benchmarks": results,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as fp:
+        json.dump(data, fp, indent=2)
+
+
+def load_results(path: Path) -> t.Dict[str, t.Dict[str, float]]:
+    with open(path, "r") as fp:
+        data = json.load(fp)
+    if data.get("version") != RESULTS_VERSION:
+        raise Exception(f"Unsupported benchmark results version in {path}.")
+    return data["benchmarks"]
+
+
+def compare(
+    results: t.Dict[str, t.Dict[str, float]],
+    baseline: t.Optional[t.Dict[str, t.Dict[str, float]]],
+    threshold: float = DEF_THRESHOLD,
+) -> t.List[str]:
+    # names of the benchmarks slower than the baseline by more than its
+    # threshold; benchmarks missing from either side are not compared
+    if not baseline:
+        return []
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        limit = base.get("threshold", threshold)
+        if result["ops_per_second"] < base["ops_per_second"] * (1 - limit):
+            regressions.append(name)
+    return regressions
+
+
+def print_results(
+    results: t.Dict[str, t.Dict[str, float]],
+    baseline: t.Optional[t.Dict[str, t.Dict[str, float]]] = None,
+    regressions: t.Iterable[str] = (),
+):
+    regressions = set(regressions)
+    header = f"{'benchmark':<18} {'ops/s':>12}"
+    if baseline:
+        header += f" {'baseline':>12} {'change':>8}"
+    print(header)
+    for name, result in results.items():
+        line = f"{name:<18} {result['ops_per_second']:>12.0f}"
+        base = (baseline or {}).get(name)
+        if base:
+            change = result["ops_per_second"] / base["ops_per_second"] - 1
+            line += f" {base['ops_per_second']:>12.0f} {change:>+8.1%}"
+            if name in regressions:
+                line += "  REGRESSION"
+        print(line)
+
+
+def bench_turns(
+    decklist_one: t.List[str],
+    decklist_two: t.List[str],
+    games=5000,
+    controller: t.Type[BaseController] = RandomController,
+    seed: int = 0,
+) -> t.Dict[str, float]:
+    battle = Battle(
+        Player("one", Deck.from_names(decklist_one), controller()),
+        Player("two", Deck.from_names(decklist_two), controller()),
+    )
+    turns = 0
+    # turn loop time excludes resetting and shuffling the decks
+    loop_seconds = 0.0
+    perf_counter = time.perf_counter
+    start = perf_counter()
+    for game in range(games):
+        # seeded like bench_battle_games, every run plays the same games
+        battle.seed(derive_seed(seed, game))
+        battle.reset(first=game % 2)
+        loop_start = perf_counter()
+        battle.run()
+        loop_seconds += perf_counter() - loop_start
+        turns += battle.turn
+    seconds = perf_counter() - start
+
+    return {
+        "games": games,
+        "turns": turns,
+        "seconds": seconds,
+        "loop_seconds": loop_seconds,
+        "turns_per_second": turns / loop_seconds,
+        "games_per_second": games / seconds,
+    }
+
+
+def bench_hand_queries(
+    decklist: t.List[str], hands=20_000, seed: int = 0
+) -> t.Dict[str, float]:
+    # the per-step Field queries of the turn loop, over freshly drawn hands
+    # with a unit in play and up to two units boosted into the DP stack
+    field = Field(Deck.from_names(decklist, random.Random(seed)))
+    queries = 0
+    seconds = 0.0
+    perf_counter = time.perf_counter
+    for _ in range(hands):
+        field.reset()
+        field.deck.shuffle()
+        field.draw_til_full()
+        if not field.has_unit_in_hand():
+            continue
+        field.play_unit(field.get_units_in_hand()[0])
+        field.draw_til_full()
+        for _ in range(2):
+            if field.has_unit_in_hand():
+                field.boost_dp(field.hand_units[0])
+                field.draw_til_full()
+
+        start = perf_counter()
+        for _ in range(10):
+            if field.has_unit_in_hand():
+                field.get_units_in_hand()
+                queries += 1
+            field.get_evolution_targets()
+            field.dp.get_value()
+        seconds += perf_counter() - start
+        queries += 30
+
+    return {
+        "queries": queries,
+        "seconds": seconds,
+        "queries_per_second": queries / seconds,
+    }
+
+
+if __name__ == "__main__":
+    main()
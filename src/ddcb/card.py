@@ -1,6 +1,7 @@
 import typing as t
 from dataclasses import dataclass as dc
 from enum import Enum
+from pathlib import Path
 
 from ddcb import PKG_DATA
 
@@ -13,6 +14,7 @@ def main():
 
     singleton2 = CardList()
     print(singleton2.get_card("agumon"))
+    print(f"Same instance: {singleton is singleton2}")
 
 
 class CardList:
@@ -20,20 +22,46 @@ class CardList:
 
     def __new__(cls, path=DEF_CARD_LIST_FILE):
         if not cls._instance:
-            print("Creating new instance...")
             cls._instance = super().__new__(cls)
-            cls._instance.load_from_json(path)
+            cls._instance.load_from_path(path)
         return cls._instance
 
+    @classmethod
+    def use(cls, cards: t.Mapping[str, "Card"]):
+        # make an already compiled mapping the singleton, e.g. one over a
+        # shared memory segment in a pool worker
+        instance = super().__new__(cls)
+        instance.load_compiled(cards)
+        cls._instance = instance
+        return instance
+
+    def load_from_path(self, path):
+        # prefer the compiled database next to the json, unless it is stale
+        from ddcb import card_db
+
+        db_path = Path(path).with_suffix(".bin")
+        if card_db.is_stale(db_path, path):
+            self.load_from_json(path)
+        else:
+            self.load_compiled(card_db.read(db_path))
+
     def load_from_json(self, path):
         self.load(CardFactory.from_json(path))
 
+    def load_compiled(self, cards):
+        self.cards: t.Mapping[str, Card] = cards
+        self.ids: t.Mapping[int, Card] = cards.ids
+
     def load(self, cards: t.Iterable["Card"]):
         self.cards = {card.name.lower(): card for card in cards}
+        self.ids = {card.id: card for card in self.cards.values()}
 
     def get_card(self, name: str):
         return self.cards[name.lower()]
 
+    def get_card_by_id(self, card_id: int):
+        return self.ids[card_id]
+
     def get_cards(self, names: t.Iterable[str]):
         return [self.get_card(c) for c in names]
 
@@ -64,7 +92,7 @@ class CardFactory:
         return "level" in d
 
 
-@dc
+@dc(frozen=True)
 class Card:
     id: int
     name: str
@@ -97,15 +125,17 @@ class Level(Enum):
     ARMOR = "A"
 
     def evolution_targets(self):
-        targets = {
-            Level.ROOKIE: [Level.CHAMPION],
-            Level.CHAMPION: [Level.ULTIMATE],
-            Level.PARTNER: [Level.CHAMPION, Level.ARMOR],
-        }
-        return targets.get(self, [])
+        return EVOLUTION_TARGETS.get(self, [])
+
+
+EVOLUTION_TARGETS = {
+    Level.ROOKIE: [Level.CHAMPION],
+    Level.CHAMPION: [Level.ULTIMATE],
+    Level.PARTNER: [Level.CHAMPION, Level.ARMOR],
+}
 
 
-@dc
+@dc(frozen=True)
 class UnitCard(Card):
     level: Level
     specialty: str
@@ -143,13 +173,13 @@ class AttackFactory:
         return "effect" in d
 
 
-@dc
+@dc(frozen=True)
 class Attack:
     name: str
     damage: int
 
 
-@dc
+@dc(frozen=True)
 class EffectAttack(Attack):
     effect: t.Optional[str] = None
 
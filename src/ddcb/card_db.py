@@ -0,0 +1,370 @@
+import argparse
+import gc
+import hashlib
+import mmap
+import struct
+import sys
+import time
+import typing as t
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+
+from ddcb.card import (
+    DEF_CARD_LIST_FILE,
+    Attack,
+    Card,
+    CardFactory,
+    CardList,
+    EffectAttack,
+    Level,
+    UnitCard,
+)
+
+# Compiled card database layout (little-endian):
+#   header   MAGIC, version, sha256 of the source json, card count, string count
+#   records  one fixed-width RECORD per card, in json order
+#   strings  STRING_OFFSET per string (plus one end offset), then utf-8 bytes
+# Strings are referenced by index into the string table, NO_STRING for None.
+DEF_CARD_DB_FILE = DEF_CARD_LIST_FILE.with_suffix(".bin")
+
+MAGIC = b"DDCB"
+VERSION = 1
+HEADER = struct.Struct("<4sHxx32sII")
+RECORD = struct.Struct("<HBB7H6Hxx")
+RECORD_ID = struct.Struct("<H")
+RECORD_NAME = struct.Struct("<4xH")
+STRING_OFFSET = struct.Struct("<I")
+NO_STRING = 0xFFFF
+
+KIND_OPTION = 0
+KIND_UNIT = 1
+LEVELS = list(Level)
+
+
+def main():
+    args = parse_args()
+    json_path = Path(args.json)
+    db_path = Path(args.db) if args.db else json_path.with_suffix(".bin")
+
+    if args.command == "build":
+        build(json_path, db_path)
+        print(f"Wrote {db_path}")
+    elif args.command == "check":
+        if is_stale(db_path, json_path):
+            print(f"{db_path} is stale, run: python -m ddcb.card_db build")
+            raise SystemExit(1)
+        print(f"{db_path} is up to date.")
+    elif args.command == "bench":
+        bench(json_path, db_path, args.repeat)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ddcb.card_db",
+        description="Build and check the compiled card database.",
+    )
+    parser.add_argument("command", choices=["build", "check", "bench"])
+    parser.add_argument("--json", default=str(DEF_CARD_LIST_FILE))
+    parser.add_argument("--db", default=None, help="defaults to the json path as .bin")
+    parser.add_argument("-r", "--repeat", type=int, default=50)
+    return parser.parse_args(argv)
+
+
+def build(json_path=DEF_CARD_LIST_FILE, db_path=DEF_CARD_DB_FILE):
+    json_path = Path(json_path)
+    data = encode(CardFactory.from_json(json_path), hash_file(json_path))
+    Path(db_path).write_bytes(data)
+
+
+def is_stale(db_path=DEF_CARD_DB_FILE, json_path=DEF_CARD_LIST_FILE):
+    try:
+        with open(db_path, "rb") as fp:
+            header = fp.read(HEADER.size)
+    except FileNotFoundError:
+        return True
+    if len(header) < HEADER.size:
+        return True
+    magic, version, digest, _, _ = HEADER.unpack(header)
+    return magic != MAGIC or version != VERSION or digest != hash_file(json_path)
+
+
+def hash_file(path) -> bytes:
+    return hashlib.sha256(Path(path).read_bytes()).digest()
+
+
+def read(path=DEF_CARD_DB_FILE) -> "CompiledCards":
+    with open(path, "rb") as fp:
+        buffer = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+    return CompiledCards(buffer)
+
+
+def compiled_bytes(json_path=DEF_CARD_LIST_FILE, db_path=DEF_CARD_DB_FILE) -> bytes:
+    if is_stale(db_path, json_path):
+        return encode(CardFactory.from_json(json_path), hash_file(json_path))
+    return Path(db_path).read_bytes()
+
+
+class SharedCardDB:
+    # The compiled database copied once into a shared memory segment. The
+    # parent owns it, pool workers attach by name with use_shared() and
+    # read cards straight out of the segment.
+    def __init__(self, json_path=DEF_CARD_LIST_FILE, db_path=DEF_CARD_DB_FILE):
+        data = compiled_bytes(json_path, db_path)
+        self.shm = SharedMemory(create=True, size=len(data))
+        self.shm.buf[: len(data)] = data
+        self.name = self.shm.name
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# the segment attached by use_shared(), kept open for the worker's lifetime
+_shared: t.Optional[SharedMemory] = None
+
+
+def attach_shared(name: str) -> SharedMemory:
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=name, track=False)
+    # Pool workers share the parent's resource tracker, which already holds
+    # the segment. Unregistering here would drop the owner's entry too.
+    return SharedMemory(name=name)
+
+
+def use_shared(name: str):
+    global _shared
+    _shared = attach_shared(name)
+    CardList.use(CompiledCards(_shared.buf))
+
+
+@contextmanager
+def shared_pool(max_workers: t.Optional[int] = None) -> t.Iterator[ProcessPoolExecutor]:
+    # a process pool whose workers share the parent's card database
+    with SharedCardDB() as shared, ProcessPoolExecutor(
+        max_workers=max_workers, initializer=use_shared, initargs=(shared.name,)
+    ) as pool:
+        yield pool
+
+
+def encode(cards: t.Iterable[Card], digest: bytes) -> bytes:
+    strings: t.Dict[str, int] = {}
+
+    def intern(s: t.Optional[str]):
+        if s is None:
+            return NO_STRING
+        return strings.setdefault(s, len(strings))
+
+    records = []
+    for card in cards:
+        if isinstance(card, UnitCard):
+            records.append(
+                RECORD.pack(
+                    card.id,
+                    KIND_UNIT,
+                    LEVELS.index(card.level),
+                    intern(card.name),
+                    intern(card.support),
+                    intern(card.specialty),
+                    intern(card.c_attack.name),
+                    intern(card.t_attack.name),
+                    intern(card.x_attack.name),
+                    intern(card.x_attack.effect),
+                    card.hp,
+                    card.dp,
+                    card.pp,
+                    card.c_attack.damage,
+                    card.t_attack.damage,
+                    card.x_attack.damage,
+                )
+            )
+        else:
+            records.append(
+                RECORD.pack(
+                    card.id,
+                    KIND_OPTION,
+                    0,
+                    intern(card.name),
+                    intern(card.support),
+                    *[NO_STRING] * 5,
+                    *[0] * 6,
+                )
+            )
+    if len(strings) >= NO_STRING:
+        raise Exception(f"Too many strings for the card database: {len(strings)}")
+
+    blobs = [s.encode() for s in strings]
+    offsets = [0]
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+
+    return b"".join(
+        [
+            HEADER.pack(MAGIC, VERSION, digest, len(records), len(strings)),
+            *records,
+            *(STRING_OFFSET.pack(o) for o in offsets),
+            *blobs,
+        ]
+    )
+
+
+def decode(buffer) -> t.List[Card]:
+    return list(CompiledCards(buffer).values())
+
+
+class CompiledCards(t.Mapping[str, Card]):
+    # Lowercase name -> Card mapping over a compiled database buffer. Only the
+    # names are decoded up front, each card is built the first time it is used.
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.view = memoryview(buffer)
+        magic, version, _, card_count, string_count = HEADER.unpack_from(self.view)
+        if magic != MAGIC or version != VERSION:
+            raise Exception(f"Not a version {VERSION} card database.")
+
+        self.records_start = HEADER.size
+        offsets_start = self.records_start + card_count * RECORD.size
+        blob_start = offsets_start + (string_count + 1) * STRING_OFFSET.size
+        self.offsets = [
+            blob_start + o
+            for (o,) in STRING_OFFSET.iter_unpack(self.view[offsets_start:blob_start])
+        ]
+
+        self.cards: t.List[t.Optional[Card]] = [None] * card_count
+        record_offsets = range(self.records_start, offsets_start, RECORD.size)
+        self.index = {
+            self.string(RECORD_NAME.unpack_from(self.view, offset)[0]).lower(): i
+            for i, offset in enumerate(record_offsets)
+        }
+        self.ids = CompiledIds(
+            self,
+            {
+                RECORD_ID.unpack_from(self.view, offset)[0]: i
+                for i, offset in enumerate(record_offsets)
+            },
+        )
+
+    def __getitem__(self, name: str) -> Card:
+        return self.card_at(self.index[name])
+
+    def card_at(self, i: int) -> Card:
+        card = self.cards[i]
+        if card is None:
+            card = self.cards[i] = self.decode_card(i)
+        return card
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+    def string(self, i: int) -> t.Optional[str]:
+        if i == NO_STRING:
+            return None
+        return str(self.view[self.offsets[i] : self.offsets[i + 1]], "utf-8")
+
+    def decode_card(self, i: int) -> Card:
+        (
+            _id,
+            kind,
+            level,
+            name,
+            support,
+            specialty,
+            c_name,
+            t_name,
+            x_name,
+            x_effect,
+            hp,
+            dp,
+            pp,
+            c_damage,
+            t_damage,
+            x_damage,
+        ) = RECORD.unpack_from(self.view, self.records_start + i * RECORD.size)
+        string = self.string
+
+        if kind == KIND_UNIT:
+            return UnitCard(
+                id=_id,
+                name=string(name),
+                support=string(support),
+                level=LEVELS[level],
+                specialty=string(specialty),
+                hp=hp,
+                dp=dp,
+                pp=pp,
+                c_attack=Attack(name=string(c_name), damage=c_damage),
+                t_attack=Attack(name=string(t_name), damage=t_damage),
+                x_attack=EffectAttack(
+                    name=string(x_name), damage=x_damage, effect=string(x_effect)
+                ),
+            )
+        return Card(id=_id, name=string(name), support=string(support))
+
+
+class CompiledIds(t.Mapping[int, Card]):
+    # Card id -> Card view sharing the lazily built cards of CompiledCards.
+    def __init__(self, compiled: CompiledCards, index: t.Dict[int, int]):
+        self.compiled = compiled
+        self.index = index
+
+    def __getitem__(self, card_id: int) -> Card:
+        return self.compiled.card_at(self.index[card_id])
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+
+def bench(json_path=DEF_CARD_LIST_FILE, db_path=DEF_CARD_DB_FILE, repeat=50):
+    if is_stale(db_path, json_path):
+        build(json_path, db_path)
+
+    timings = {
+        "json": _time(lambda: list(CardFactory.from_json(json_path)), repeat),
+        "compiled": _time(lambda: read(db_path), repeat),
+        "compiled + staleness check": _time(
+            lambda: is_stale(db_path, json_path) or read(db_path), repeat
+        ),
+        "compiled, every card decoded": _time(
+            lambda: list(read(db_path).values()), repeat
+        ),
+    }
+    with SharedCardDB(json_path, db_path) as shared:
+        attached = []
+        timings["shared memory attach"] = _time(
+            lambda: attached.append(attach_shared(shared.name))
+            or CompiledCards(attached[-1].buf),
+            repeat,
+        )
+        # the card views must be gone before the segments can close
+        gc.collect()
+        for shm in attached:
+            shm.close()
+    for name, seconds in timings.items():
+        print(f"{name:>28}: {seconds * 1000:.3f} ms")
+    print(f"{'speedup':>28}: {timings['json'] / timings['compiled']:.1f}x")
+
+
+def _time(func: t.Callable, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    main()
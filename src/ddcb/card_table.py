@@ -0,0 +1,195 @@
+import typing as t
+
+import numpy as np
+
+from ddcb.card import Card, CardList, Level, UnitCard
+from ddcb.card_db import KIND_UNIT, CompiledCards
+from ddcb.field import Deck
+
+LEVELS = list(Level)
+NO_CODE = -1
+
+# numpy twin of card_db.RECORD
+RECORD_DTYPE = np.dtype(
+    [
+        ("id", "<u2"),
+        ("kind", "u1"),
+        ("level", "u1"),
+        ("name", "<u2"),
+        ("support", "<u2"),
+        ("specialty", "<u2"),
+        ("c_name", "<u2"),
+        ("t_name", "<u2"),
+        ("x_name", "<u2"),
+        ("x_effect", "<u2"),
+        ("hp", "<u2"),
+        ("dp", "<u2"),
+        ("pp", "<u2"),
+        ("c_damage", "<u2"),
+        ("t_damage", "<u2"),
+        ("x_damage", "<u2"),
+        ("_", "V2"),
+    ]
+)
+
+# int columns of the table, option cards hold 0 in every stat column
+STAT_COLUMNS = ("hp", "dp", "pp", "c_damage", "t_damage", "x_damage")
+
+
+def main():
+    table = CardTable.from_card_list()
+    decks = np.stack([table.deck_ids(Deck.from_random()) for _ in range(1000)])
+    print("units per deck:", table.unit_counts(decks)[:10])
+    print("mean unit hp:", table.mean("hp", decks)[:10].round())
+    print("level counts:", table.level_counts(decks)[:3].tolist())
+
+
+class CardTable:
+    # Struct-of-arrays view of the card list. Rows are indexed by card id, so
+    # arrays of card ids (of any shape) index straight into every column.
+    def __init__(
+        self,
+        columns: t.Dict[str, np.ndarray],
+        specialties: t.List[str],
+        index: t.Dict[str, int],
+    ):
+        self.id: np.ndarray = columns["id"]
+        self.is_unit: np.ndarray = columns["is_unit"]
+        self.level: np.ndarray = columns["level"]
+        self.specialty: np.ndarray = columns["specialty"]
+        self.hp: np.ndarray = columns["hp"]
+        self.dp: np.ndarray = columns["dp"]
+        self.pp: np.ndarray = columns["pp"]
+        self.c_damage: np.ndarray = columns["c_damage"]
+        self.t_damage: np.ndarray = columns["t_damage"]
+        self.x_damage: np.ndarray = columns["x_damage"]
+
+        self.levels = LEVELS
+        self.specialties = specialties
+        self.index = index
+
+    @classmethod
+    def from_card_list(cls, card_list: t.Optional[CardList] = None):
+        card_list = card_list or CardList()
+        if isinstance(card_list.cards, CompiledCards):
+            return cls.from_compiled(card_list.cards)
+        return cls.from_cards(card_list.cards.values())
+
+    @classmethod
+    def from_compiled(cls, compiled: CompiledCards):
+        # view the fixed-width records in place, no card objects are built
+        records = np.frombuffer(
+            compiled.buffer,
+            dtype=RECORD_DTYPE,
+            count=len(compiled.cards),
+            offset=compiled.records_start,
+        )
+        size = int(records["id"].max()) + 1
+        ids = records["id"].astype(np.intp)
+        is_unit = records["kind"] == KIND_UNIT
+
+        columns = {
+            "id": np.arange(size, dtype=np.int32),
+            "is_unit": np.zeros(size, dtype=bool),
+            "level": np.full(size, NO_CODE, dtype=np.int8),
+            "specialty": np.full(size, NO_CODE, dtype=np.int8),
+        }
+        columns["is_unit"][ids] = is_unit
+        columns["level"][ids[is_unit]] = records["level"][is_unit]
+        specialty_strings, codes = np.unique(
+            records["specialty"][is_unit], return_inverse=True
+        )
+        columns["specialty"][ids[is_unit]] = codes
+        for name in STAT_COLUMNS:
+            columns[name] = np.zeros(size, dtype=np.int32)
+            columns[name][ids] = records[name]
+
+        index = {name: int(ids[row]) for name, row in compiled.index.items()}
+        specialties = [compiled.string(int(i)) for i in specialty_strings]
+        return cls(columns, specialties, index)
+
+    @classmethod
+    def from_cards(cls, cards: t.Iterable[Card]):
+        cards = list(cards)
+        size = max(card.id for card in cards) + 1
+        columns = {
+            "id": np.arange(size, dtype=np.int32),
+            "is_unit": np.zeros(size, dtype=bool),
+            "level": np.full(size, NO_CODE, dtype=np.int8),
+            "specialty": np.full(size, NO_CODE, dtype=np.int8),
+            **{name: np.zeros(size, dtype=np.int32) for name in STAT_COLUMNS},
+        }
+        index = {card.name.lower(): card.id for card in cards}
+        specialties: t.Dict[str, int] = {}
+
+        for card in cards:
+            if not isinstance(card, UnitCard):
+                continue
+            columns["is_unit"][card.id] = True
+            columns["level"][card.id] = LEVELS.index(card.level)
+            columns["specialty"][card.id] = specialties.setdefault(
+                card.specialty, len(specialties)
+            )
+            columns["hp"][card.id] = card.hp
+            columns["dp"][card.id] = card.dp
+            columns["pp"][card.id] = card.pp
+            columns["c_damage"][card.id] = card.c_attack.damage
+            columns["t_damage"][card.id] = card.t_attack.damage
+            columns["x_damage"][card.id] = card.x_attack.damage
+
+        return cls(columns, list(specialties), index)
+
+    def __len__(self):
+        return len(self.id)
+
+    def column(self, name: str) -> np.ndarray:
+        return getattr(self, name)
+
+    def ids(self, names: t.Iterable[str]) -> np.ndarray:
+        return np.array([self.index[name.lower()] for name in names], dtype=np.int32)
+
+    def deck_ids(self, deck: Deck) -> np.ndarray:
+        return np.asarray(deck.card_ids(), dtype=np.int32)
+
+    def decks_ids(self, decks: t.Iterable[Deck]) -> np.ndarray:
+        return np.stack([self.deck_ids(deck) for deck in decks])
+
+    # Aggregates over the last axis of an id array: (30,) for one deck,
+    # (n_decks, 30) for a pool of decks, and so on.
+    def unit_counts(self, ids: np.ndarray) -> np.ndarray:
+        return self.is_unit[ids].sum(axis=-1)
+
+    def total(self, name: str, ids: np.ndarray) -> np.ndarray:
+        return self.column(name)[ids].sum(axis=-1)
+
+    def mean(self, name: str, ids: np.ndarray, units_only=True) -> np.ndarray:
+        values = self.column(name)[ids]
+        if not units_only:
+            return values.mean(axis=-1)
+        counts = self.unit_counts(ids)
+        totals = np.where(self.is_unit[ids], values, 0).sum(axis=-1)
+        return np.divide(totals, counts, out=np.zeros(counts.shape), where=counts > 0)
+
+    def max(self, name: str, ids: np.ndarray) -> np.ndarray:
+        return self.column(name)[ids].max(axis=-1)
+
+    def level_counts(self, ids: np.ndarray) -> np.ndarray:
+        return self._code_counts(self.level[ids], len(self.levels))
+
+    def specialty_counts(self, ids: np.ndarray) -> np.ndarray:
+        return self._code_counts(self.specialty[ids], len(self.specialties))
+
+    @staticmethod
+    def _code_counts(codes: np.ndarray, n_codes: int) -> np.ndarray:
+        # one bincount over (row, code) pairs, option cards (NO_CODE) dropped
+        shape = codes.shape[:-1]
+        codes = codes.reshape(-1, codes.shape[-1])
+        rows = np.broadcast_to(np.arange(len(codes))[:, None], codes.shape)
+        mask = codes != NO_CODE
+        flat = rows[mask] * n_codes + codes[mask]
+        counts = np.bincount(flat, minlength=len(codes) * n_codes)
+        return counts.reshape(*shape, n_codes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import typing as t
+from collections import defaultdict
+from contextlib import contextmanager
+
+from ddcb.card import Attack, Card, UnitCard
+
+# Game events. `seat` is the player the event happened to, 0 or 1.
+
+
+class Draw(t.NamedTuple):
+    turn: int
+    seat: int
+    cards: t.Tuple[Card, ...]
+    # fewer cards than requested are drawn from a short deck
+    requested: int
+
+
+class Mulligan(t.NamedTuple):
+    turn: int
+    seat: int
+    cards: t.Tuple[Card, ...]
+    # forced because the hand had no unit
+    auto: bool
+
+
+class Play(t.NamedTuple):
+    turn: int
+    seat: int
+    card: UnitCard
+
+
+class Boost(t.NamedTuple):
+    turn: int
+    seat: int
+    card: UnitCard
+    dp: int
+
+
+class Evolve(t.NamedTuple):
+    turn: int
+    seat: int
+    card: UnitCard
+    previous: UnitCard
+
+
+class AttackChosen(t.NamedTuple):
+    turn: int
+    seat: int
+    attack: Attack
+    counter: bool
+
+
+class Damage(t.NamedTuple):
+    turn: int
+    seat: int
+    damage: int
+    hp: int
+
+
+class Result(t.NamedTuple):
+    turn: int
+    # from player one's point of view, a BattleResult
+    result: t.Any
+
+
+Event = t.Union[Draw, Mulligan, Play, Boost, Evolve, AttackChosen, Damage, Result]
+EVENT_TYPES = (Draw, Mulligan, Play, Boost, Evolve, AttackChosen, Damage, Result)
+Subscriber = t.Callable[[Event], None]
+
+
+class EventBus:
+    # Emitters guard every event with `if bus.listening:`, so a bus without
+    # subscribers costs one attribute check and never builds the event.
+    def __init__(self):
+        self.subscribers: t.Dict[type, t.List[Subscriber]] = defaultdict(list)
+        self.listening = False
+
+    def subscribe(self, callback: Subscriber, *types: type):
+        for event_type in types or EVENT_TYPES:
+            self.subscribers[event_type].append(callback)
+        self.listening = True
+
+    def unsubscribe(self, callback: Subscriber):
+        for callbacks in self.subscribers.values():
+            while callback in callbacks:
+                callbacks.remove(callback)
+        self.listening = any(self.subscribers.values())
+
+    @contextmanager
+    def paused(self):
+        # e.g. while a search plays hypothetical moves on the real battle
+        listening, self.listening = self.listening, False
+        try:
+            yield self
+        finally:
+            self.listening = listening
+
+    def emit(self, event: Event):
+        for callback in self.subscribers.get(type(event), ()):
+            callback(event)
+
+
+def format_event(event: Event) -> str:
+    player = f"Player {event.seat + 1}" if hasattr(event, "seat") else ""
+    if isinstance(event, Draw):
+        text = f"{player} draws {len(event.cards)} cards"
+        if len(event.cards) < event.requested:
+            text += f", the deck was short of {event.requested}"
+        return text
+    if isinstance(event, Mulligan):
+        return f"{player} {'is forced to ' if event.auto else ''}mulligan"
+    if isinstance(event, Play):
+        return f"{player} plays {event.card.name}"
+    if isinstance(event, Boost):
+        return f"{player} boosts DP with {event.card.name} ({event.dp} DP)"
+    if isinstance(event, Evolve):
+        return f"{player} evolves {event.previous.name} into {event.card.name}"
+    if isinstance(event, AttackChosen):
+        verb = "counters with" if event.counter else "attacks with"
+        return f"{player} {verb} {event.attack.name} ({event.attack.damage})"
+    if isinstance(event, Damage):
+        return f"{player} takes {event.damage} damage, {event.hp} HP left"
+    if isinstance(event, Result):
+        return f"Player 1 {event.result.name} on turn {event.turn}"
+    return repr(event)
+
+
+def print_event(event: Event):
+    print(format_event(event))
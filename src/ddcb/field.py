@@ -1,9 +1,12 @@
 import random
 import typing as t
+from array import array
 
-from ddcb.card import Card, CardList, UnitCard
+from ddcb.card import Card, CardList, Level, UnitCard
+from ddcb.seeding import RNG
 
 MAX_HAND_SIZE = 4
+NO_CARD = -1
 
 type CardOrName = Card | str
 type UnitOrName = UnitCard | str
@@ -20,58 +23,101 @@ def main():
 class Field:
     def __init__(self, deck: "Deck"):
         self.deck: Deck = deck
+        # change the hand through the methods below, they keep the hand
+        # indexes up to date; set_hand() rebuilds them
         self.hand: t.List[Card] = []
         self.discard_pile: t.List[Card] = []
 
-        self.unit: t.Optional[UnitCard] = None
+        # hand indexes: the units in hand order, units per level and cards
+        # per name
+        self.hand_units: t.List[UnitCard] = []
+        self.hand_levels: t.Dict[Level, int] = dict.fromkeys(Level, 0)
+        self.hand_names: t.Dict[str, int] = {}
+
+        self.unit: t.Optional[Unit] = None
         self.dp: "DPStack" = DPStack()
 
+        # the active unit record is reused across plays and battles
+        self._unit = Unit(owner=self)
+        # every card a snapshot can name comes from this field's deck
+        self._cards_by_id = {card.id: card for card in deck.template}
+
     def reset(self):
         self.deck.reset()
-        self.hand = []
-        self.discard_pile = []
+        self.set_hand([])
+        self.discard_pile.clear()
 
         self.unit = None
-        self.dp = DPStack()
-
-    def draw(self, count=1):
-        deck_count = len(self.deck)
-        draw_count = min(count, deck_count)
-
-        if draw_count < count:
-            print(f"Unable to draw {count} cards, since deck has {deck_count} cards.")
-            print(f"Drawing {draw_count} cards instead.")
+        self.dp.clear()
 
+    def draw(self, count=1) -> int:
+        # a short deck draws what it has, returns the number drawn
+        draw_count = min(count, len(self.deck))
         for _ in range(draw_count):
             card = self.deck.draw()
             self.hand.append(card)
+            self._index_card(card)
+        return draw_count
 
-    def draw_til_full(self):
-        self.draw(MAX_HAND_SIZE - len(self.hand))
+    def draw_til_full(self) -> int:
+        return self.draw(MAX_HAND_SIZE - len(self.hand))
 
     def discard(self, index=0):
         card = self.hand.pop(index)
+        self._unindex_card(card, index)
         self.discard_pile.append(card)
 
     def discard_hand(self):
-        for _ in range(len(self.hand)):
-            self.discard()
+        self.discard_pile.extend(self.hand)
+        self.set_hand([])
+
+    def set_hand(self, cards: t.Iterable[Card]):
+        self.hand[:] = cards
+        self.hand_units.clear()
+        for level in self.hand_levels:
+            self.hand_levels[level] = 0
+        self.hand_names.clear()
+        for card in self.hand:
+            self._index_card(card)
+
+    def _index_card(self, card: Card):
+        names = self.hand_names
+        names[card.name] = names.get(card.name, 0) + 1
+        if isinstance(card, UnitCard):
+            self.hand_units.append(card)
+            self.hand_levels[card.level] += 1
+
+    def _unindex_card(self, card: Card, index: int):
+        # `index` is where the card was in the hand before it was removed
+        names = self.hand_names
+        if names[card.name] == 1:
+            del names[card.name]
+        else:
+            names[card.name] -= 1
+        if isinstance(card, UnitCard):
+            # the unit's place in hand_units is the number of units before it,
+            # equal cards are the same object so identity can't tell
+            position = 0
+            for other in self.hand[:index]:
+                position += isinstance(other, UnitCard)
+            del self.hand_units[position]
+            self.hand_levels[card.level] -= 1
 
     def play_unit(self, unit: UnitOrName):
         unit_card = self.pop_unit_from_hand(unit)
-        self.unit = unit_card
+        self.unit = self._unit.bind(unit_card)
 
     def discard_unit(self):
         if self.unit is None:
             raise Exception("Tried to discard unit, but there isn't one.")
-        self.discard_pile.append(self.unit)
+        self.discard_pile.append(self.unit.card)
         self.unit = None
 
     def has_unit_in_hand(self):
-        return any((isinstance(card, UnitCard) for card in self.hand))
+        return bool(self.hand_units)
 
     def get_units_in_hand(self):
-        return [card for card in self.hand if isinstance(card, UnitCard)]
+        return self.hand_units.copy()
 
     def has_unit(self):
         return bool(self.unit)
@@ -84,9 +130,14 @@ class Field:
         if not self.unit:
             raise Exception("No unit active when checking evolution targets.")
 
-        units_in_hand = self.get_units_in_hand()
-        target_levels = self.unit.level.evolution_targets()
-        return [unit for unit in units_in_hand if unit.level in target_levels]
+        target_levels = self.unit.card.level.evolution_targets()
+        levels = self.hand_levels
+        for level in target_levels:
+            if levels[level]:
+                break
+        else:
+            return []
+        return [unit for unit in self.hand_units if unit.level in target_levels]
 
     def evolve_unit(self, unit: UnitOrName):
         unit_card = self.pop_unit_from_hand(unit)
@@ -96,9 +147,33 @@ class Field:
 
         prev_unit_health = self.unit.hp
         self.discard_unit()
-        self.unit = unit_card
+        self.unit = self._unit.bind(unit_card)
         self.unit.hp = max(self.unit.hp, prev_unit_health)
 
+    def snapshot(self) -> "FieldState":
+        unit = self.unit
+        return FieldState(
+            deck=card_ids_to_bytes(self.deck.cards),
+            hand=card_ids_to_bytes(self.hand),
+            discard_pile=card_ids_to_bytes(self.discard_pile),
+            dp=card_ids_to_bytes(self.dp.stack),
+            unit=unit.card.id if unit else NO_CARD,
+            hp=unit.hp if unit else 0,
+        )
+
+    def restore(self, state: "FieldState"):
+        get_card = self._cards_by_id.__getitem__
+        self.deck.cards[:] = map(get_card, memoryview(state.deck).cast("H"))
+        self.set_hand(map(get_card, memoryview(state.hand).cast("H")))
+        self.discard_pile[:] = map(get_card, memoryview(state.discard_pile).cast("H"))
+        self.dp.load(map(get_card, memoryview(state.dp).cast("H")))
+
+        if state.unit == NO_CARD:
+            self.unit = None
+        else:
+            self.unit = self._unit.bind(get_card(state.unit))
+            self.unit.hp = state.hp
+
     def pop_unit_from_hand(self, unit: UnitOrName) -> UnitCard:
         card = self.pop_card_from_hand(unit)
         if isinstance(card, UnitCard):
@@ -107,29 +182,71 @@ class Field:
             raise Exception(f"f{card.name} is not a Unit!")
 
     def pop_card_from_hand(self, card: CardOrName):
-        i = Card.find_index(self.hand, card)
+        name = card if isinstance(card, str) else card.name
+        i = Card.find_index(self.hand, card) if name in self.hand_names else None
         if i is None:
-            raise Exception(
-                f"Card named {card if isinstance(card, str) else card.name} not found!"
-            )
-        return self.hand.pop(i)
+            raise Exception(f"Card named {name} not found!")
+        card = self.hand.pop(i)
+        self._unindex_card(card, i)
+        return card
+
+
+class FieldState(t.NamedTuple):
+    # Compact, hashable copy of a Field: card ids packed as uint16 bytes,
+    # in list order, plus the active unit's id and current HP.
+    deck: bytes
+    hand: bytes
+    discard_pile: bytes
+    dp: bytes
+    unit: int
+    hp: int
+
+
+def card_ids_to_bytes(cards: t.Iterable[Card]) -> bytes:
+    return array("H", [card.id for card in cards]).tobytes()
+
+
+class Unit:
+    # mutable per-battle state of the active unit, cards themselves are
+    # frozen prototypes shared by every deck
+    __slots__ = ("card", "hp", "owner")
+
+    def __init__(self, owner: Field):
+        self.card: t.Optional[UnitCard] = None
+        self.hp = 0
+        self.owner = owner
+
+    def bind(self, card: UnitCard):
+        self.card = card
+        self.hp = card.hp
+        return self
 
 
 class DPStack:
     def __init__(self):
         self.stack: t.List[UnitCard] = []
+        # running total of the stack's pp
+        self.value = 0
+
+    def clear(self):
+        self.stack.clear()
+        self.value = 0
+
+    def load(self, units: t.Iterable[UnitCard]):
+        self.stack[:] = units
+        self.value = sum(unit.pp for unit in self.stack)
 
     def get_value(self) -> int:
-        value = 0
-        for unit in self.stack:
-            value = value + unit.pp
-        return value
+        return self.value
 
     def push(self, unit: UnitCard):
         self.stack.append(unit)
+        self.value += unit.pp
 
     def pop(self):
-        return self.stack.pop()
+        unit = self.stack.pop()
+        self.value -= unit.pp
+        return unit
 
     def peek(self):
         return self.stack[-1]
@@ -138,15 +255,22 @@ class DPStack:
 class Deck:
     SIZE = 30
 
-    def __init__(self, cards: t.List[Card]):
-        self.cards = cards.copy()
+    def __init__(self, cards: t.List[Card], rng: RNG = random):
+        # the cards in decklist order, resolved once; reset() copies them
+        # back into the same `cards` list instead of looking names up again
+        self.template: t.Tuple[Card, ...] = tuple(cards)
+        self.cards = list(self.template)
         self.decklist = [c.name for c in cards]
+        self.rng = rng
 
     def reset(self):
-        self.__init__(CardList().get_cards(self.decklist))
+        self.cards[:] = self.template
 
     def shuffle(self):
-        random.shuffle(self.cards)
+        self.rng.shuffle(self.cards)
+
+    def card_ids(self):
+        return [card.id for card in self.template]
 
     def draw(self):
         return self.cards.pop()
@@ -155,9 +279,9 @@ class Deck:
         return len(self.cards) < 1
 
     @staticmethod
-    def from_random():
-        cards = random.sample(list(CardList().cards.keys()), Deck.SIZE)
-        return Deck.from_names(cards)
+    def from_random(rng: RNG = random):
+        cards = rng.sample(list(CardList().cards.keys()), Deck.SIZE)
+        return Deck.from_names(cards, rng)
 
     @staticmethod
     def from_json(path):
@@ -168,9 +292,9 @@ class Deck:
         return Deck.from_names(names)
 
     @staticmethod
-    def from_names(names: t.List[str]):
+    def from_names(names: t.List[str], rng: RNG = random):
         cards = CardList().get_cards(names)
-        return Deck(cards)
+        return Deck(cards, rng)
 
     def __len__(self):
         return len(self.cards)
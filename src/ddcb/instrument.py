@@ -0,0 +1,219 @@
+import argparse
+import json
+import typing as t
+from array import array
+from collections import Counter
+from pathlib import Path
+from time import perf_counter_ns
+
+from ddcb.base_controller import BaseController
+from ddcb.battle import Battle, Step, StepSpec
+from ddcb.field import Deck
+from ddcb.player import Player
+from ddcb.seeding import derive_seed
+from ddcb.simulate import DEF_CONTROLLER, load_controller
+
+PHASES = {
+    Step.DRAW: "prep",
+    Step.CONFIRM_HAND: "prep",
+    Step.PLAY_UNIT: "prep",
+    Step.BOOST_DP: "upgrade",
+    Step.EVOLVE: "upgrade",
+    Step.ATTACK: "battle",
+    Step.COUNTER: "battle",
+    Step.RESOLVE: "battle",
+    Step.END_TURN: "battle",
+}
+PERCENTILES = (50, 90, 99)
+
+
+def main():
+    args = parse_args()
+    controller = load_controller(args.controller)
+    battle = Battle(
+        Player("one", Deck.from_json(args.deck_one), controller()),
+        Player("two", Deck.from_json(args.deck_two), controller()),
+    )
+    instruments = Instruments()
+    instruments.attach(battle)
+    for game in range(args.games):
+        battle.battle(first=game % 2, seed=derive_seed(args.seed, game))
+    instruments.detach(battle)
+
+    report = instruments.report()
+    print_report(report)
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2))
+        print(f"report in {args.out}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ddcb.instrument",
+        description="Play seeded games and report where the time goes.",
+    )
+    parser.add_argument("deck_one", help="JSON decklist for player one")
+    parser.add_argument("deck_two", help="JSON decklist for player two")
+    parser.add_argument("-n", "--games", type=int, default=1000)
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument(
+        "-c",
+        "--controller",
+        default=DEF_CONTROLLER,
+        help="controller class as 'module:ClassName'",
+    )
+    parser.add_argument("-o", "--out", type=Path, help="write the report as JSON")
+    return parser.parse_args(argv)
+
+
+class Instruments:
+    # Opt in per battle. attach() gives the battle its own copy of the step
+    # table with timed run/decide/ask functions; Battle looks steps up with
+    # self.STEPS, so only attached battles pay for the timers. Mulligans and
+    # turns per game are counted by the same wrapped steps. Subscribing to
+    # the event bus instead would make every emit site build its event and
+    # inflate the timers being reported.
+    #
+    # Controller time is measured around `ask` and is not part of the step
+    # timers. A controller that searches on the battle itself (MCTS) runs
+    # steps inside its own `ask`, those are timed as well but their games
+    # are hypothetical and not counted.
+    def __init__(self):
+        self.step_calls = Counter()
+        self.step_ns = Counter()
+        self.latency_ns: t.Dict[Step, array] = {}
+        self.mulligans: Counter = Counter()
+        self.turns: Counter = Counter()
+        self._game_mulligans = 0
+        self._asking = 0
+
+    def attach(self, battle: Battle):
+        battle.STEPS = tuple(
+            self.wrap(Step(i), spec) for i, spec in enumerate(type(battle).STEPS)
+        )
+
+    def detach(self, battle: Battle):
+        del battle.STEPS
+
+    def wrap(self, step: Step, spec: StepSpec) -> StepSpec:
+        run = self.timed(step, spec.run)
+        if spec.decide is None:
+            return spec._replace(run=run)
+        return spec._replace(
+            run=run,
+            decide=self.timed(step, spec.decide),
+            ask=self.timed_ask(step, spec.ask),
+        )
+
+    def timed(self, step: Step, func: t.Callable) -> t.Callable:
+        calls, total = self.step_calls, self.step_ns
+        # a mulligan sends a confirmed hand back to drawing
+        mulligans = step == Step.CONFIRM_HAND
+
+        def timed(battle: Battle, *args):
+            start = perf_counter_ns()
+            try:
+                next_step = func(battle, *args)
+            finally:
+                total[step] += perf_counter_ns() - start
+                calls[step] += 1
+            if not self._asking:
+                if mulligans and next_step == Step.DRAW:
+                    self._game_mulligans += 1
+                if battle.result is not None:
+                    self.end_game(battle.turn)
+            return next_step
+
+        return timed
+
+    def timed_ask(self, step: Step, ask: t.Callable) -> t.Callable:
+        samples = self.latency_ns.setdefault(step, array("q"))
+
+        def timed_ask(controller: BaseController, options):
+            self._asking += 1
+            start = perf_counter_ns()
+            try:
+                return ask(controller, options)
+            finally:
+                samples.append(perf_counter_ns() - start)
+                self._asking -= 1
+
+        return timed_ask
+
+    def end_game(self, turns: int):
+        self.mulligans[self._game_mulligans] += 1
+        self.turns[turns] += 1
+        self._game_mulligans = 0
+        self._asking = 0
+
+    def report(self) -> t.Dict[str, t.Any]:
+        steps = {
+            step.name: {"calls": self.step_calls[step], "ns": self.step_ns[step]}
+            for step in Step
+            if self.step_calls[step]
+        }
+        phases = Counter()
+        for step in Step:
+            phases[PHASES[step]] += self.step_ns[step]
+        controller_ns = sum(sum(samples) for samples in self.latency_ns.values())
+        phases["controller"] = controller_ns
+
+        games = sum(self.turns.values())
+        return {
+            "games": games,
+            "phases_ns": dict(phases),
+            "steps": steps,
+            "controller": {
+                step.name: latency_stats(samples)
+                for step, samples in self.latency_ns.items()
+                if samples
+            },
+            "mulligans_per_game": {
+                "mean": _mean(self.mulligans, games),
+                "histogram": _histogram(self.mulligans),
+            },
+            "turns_per_game": {
+                "mean": _mean(self.turns, games),
+                "histogram": _histogram(self.turns),
+            },
+        }
+
+
+def latency_stats(samples: t.Sequence[int]) -> t.Dict[str, float]:
+    ordered = sorted(samples)
+    stats = {"calls": len(ordered), "mean_ns": sum(ordered) / len(ordered)}
+    for p in PERCENTILES:
+        # nearest rank
+        stats[f"p{p}_ns"] = ordered[max(0, -(-p * len(ordered) // 100) - 1)]
+    stats["max_ns"] = ordered[-1]
+    return stats
+
+
+def _mean(histogram: Counter, total: int) -> float:
+    return sum(k * n for k, n in histogram.items()) / total if total else 0.0
+
+
+def _histogram(counter: Counter) -> t.Dict[str, int]:
+    # string keys, as JSON objects have them anyway
+    return {str(k): counter[k] for k in sorted(counter)}
+
+
+def print_report(report: t.Dict[str, t.Any]):
+    phases = report["phases_ns"]
+    total = sum(phases.values()) or 1
+    print(f"{report['games']} games")
+    for phase, ns in phases.items():
+        print(f"  {phase:<10} {ns / 1e6:>10.1f} ms {ns / total:>6.1%}")
+    print("controller latency")
+    for step, stats in report["controller"].items():
+        print(
+            f"  {step:<12} {stats['calls']:>8} calls"
+            + "".join(f"  p{p} {stats[f'p{p}_ns'] / 1000:.1f}us" for p in PERCENTILES)
+        )
+    mulligans, turns = report["mulligans_per_game"], report["turns_per_game"]
+    print(f"mulligans per game: {mulligans['mean']:.2f}")
+    print(f"turns per game: {turns['mean']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+import argparse
+import os
+import typing as t
+from pathlib import Path
+
+import numpy as np
+
+from ddcb.base_controller import RandomController
+from ddcb.battle import Battle, BattleResult
+from ddcb.card import DEF_CARD_LIST_FILE, Attack, CardFactory
+from ddcb.card_db import hash_file
+from ddcb.card_table import CardTable
+from ddcb.field import Deck
+from ddcb.player import Player
+from ddcb.seeding import derive_seed
+
+DEF_CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "ddcb"
+)
+# HP and damage in the card data are multiples of this, so hits only need
+# computing once per HP_STEP of remaining HP
+HP_STEP = 10
+# hits needed by an attack that does no damage, or against a non-unit
+NEVER = 255
+SLOTS = ("c", "t", "x")
+
+
+def main():
+    args = parse_args()
+    matrix = KillMatrix.load(args.json, args.cache)
+    print(f"{matrix.path}: {matrix.hits.nbytes + matrix.hits_at.nbytes} bytes")
+    decks = [Deck.from_json(path) for path in (args.deck_one, args.deck_two)]
+    for name, (deck, other) in (("one", decks), ("two", decks[::-1])):
+        mean = matrix.mean_hits(deck.card_ids(), other.card_ids())
+        print(f"deck {name} needs {mean:.2f} hits per kill on average")
+
+    # both seats in turn, against RandomController
+    wins = 0
+    for seat in (0, 1):
+        controllers = [RandomController(), RandomController()]
+        controllers[seat] = KillController()
+        battle = Battle(
+            Player("one", Deck.from_names(decks[0].decklist), controllers[0]),
+            Player("two", Deck.from_names(decks[1].decklist), controllers[1]),
+        )
+        for game in range(args.games):
+            result = battle.battle(first=game % 2, seed=derive_seed(seat, game))
+            wins += (result if seat == 0 else result.flip()) == BattleResult.Win
+    print(
+        f"KillController won {wins} of {2 * args.games} games "
+        "against RandomController"
+    )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ddcb.kill_matrix",
+        description="Build the cached damage and hits-to-kill matrices.",
+    )
+    parser.add_argument("deck_one", help="JSON decklist for player one")
+    parser.add_argument("deck_two", help="JSON decklist for player two")
+    parser.add_argument("-n", "--games", type=int, default=2000)
+    parser.add_argument("--json", type=Path, default=DEF_CARD_LIST_FILE)
+    parser.add_argument("--cache", type=Path, default=DEF_CACHE_DIR)
+    return parser.parse_args(argv)
+
+
+class KillMatrix:
+    # Arrays indexed by card id, like CardTable:
+    #   damage[attacker, slot]           damage of the C/T/X attack
+    #   hits[attacker, defender, slot]   hits to kill the defender at full HP
+    #   hits_at[attacker, slot, hp / HP_STEP]   hits to kill from that HP
+    # Every turn the unit on each side is hit once, by the attack or by the
+    # counter, so hits are also the turns it takes.
+    def __init__(self, damage: np.ndarray, hits: np.ndarray, hits_at: np.ndarray):
+        self.damage = damage
+        self.hits = hits
+        self.hits_at = hits_at
+        self.path: t.Optional[Path] = None
+        # plain lists for single lookups, numpy scalar indexing is slower
+        self._damage = damage.tolist()
+        self._hits_at = hits_at.tolist()
+        # best_at[attacker][hp / HP_STEP]: fewest hits, then most damage
+        score = hits_at.astype(np.int32) * (damage.max() + 1) - damage[:, :, None]
+        self._best_at = score.argmin(axis=1).tolist()
+
+    @classmethod
+    def build(cls, table: CardTable) -> "KillMatrix":
+        damage = np.stack([table.c_damage, table.t_damage, table.x_damage], axis=1)
+        damage = np.where(table.is_unit[:, None], damage, 0).astype(np.int32)
+        hp = np.where(table.is_unit, table.hp, 0).astype(np.int32)
+        if (hp % HP_STEP).any() or (damage % HP_STEP).any():
+            raise Exception(f"Card HP and damage must be multiples of {HP_STEP}.")
+
+        hits = _hits(damage[:, None, :], hp[None, :, None])
+        hits[:, ~table.is_unit, :] = NEVER
+        steps = np.arange(hp.max() // HP_STEP + 1, dtype=np.int32) * HP_STEP
+        hits_at = _hits(damage[:, :, None], steps[None, None, :])
+        return cls(damage, hits, hits_at)
+
+    @classmethod
+    def load(
+        cls, json_path=DEF_CARD_LIST_FILE, cache_dir: Path = DEF_CACHE_DIR
+    ) -> "KillMatrix":
+        # The cache file is named after the card data's hash, edited card
+        # data builds and caches a new one.
+        digest = hash_file(json_path).hex()[:16]
+        path = Path(cache_dir) / f"kill-matrix-{digest}.npz"
+        try:
+            with np.load(path) as data:
+                matrix = cls(data["damage"], data["hits"], data["hits_at"])
+        except (FileNotFoundError, KeyError, ValueError):
+            # the loaded card list for its own file, no second parse
+            if Path(json_path) == Path(DEF_CARD_LIST_FILE):
+                table = CardTable.from_card_list()
+            else:
+                table = CardTable.from_cards(CardFactory.from_json(json_path))
+            matrix = cls.build(table)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp.npz")
+            np.savez(
+                tmp, damage=matrix.damage, hits=matrix.hits, hits_at=matrix.hits_at
+            )
+            os.replace(tmp, path)
+        matrix.path = path
+        return matrix
+
+    def hits_to_kill(self, attacker: int, slot: int, hp: int) -> int:
+        if hp <= 0:
+            return 0
+        hits = self._hits_at[attacker][slot]
+        step = -(-hp // HP_STEP)
+        if step >= len(hits):
+            damage = self._damage[attacker][slot]
+            return min(-(-hp // damage), NEVER - 1) if damage else NEVER
+        return hits[step]
+
+    def hits_to_kill_many(
+        self, attackers: np.ndarray, slots: np.ndarray, hps: np.ndarray
+    ) -> np.ndarray:
+        # like hits_to_kill, HP beyond the largest card HP is computed
+        hps = np.maximum(hps, 0)
+        steps = -(-hps // HP_STEP)
+        last = self.hits_at.shape[-1] - 1
+        hits = self.hits_at[attackers, slots, np.minimum(steps, last)]
+        beyond = steps > last
+        if beyond.any():
+            hits = np.where(beyond, _hits(self.damage[attackers, slots], hps), hits)
+        return hits
+
+    def best_slot(self, attacker: int, hp: int) -> int:
+        # fewest hits, the most damage among equals
+        best = self._best_at[attacker]
+        step = -(-max(hp, 0) // HP_STEP)
+        if step >= len(best):
+            return max(range(len(SLOTS)), key=self._damage[attacker].__getitem__)
+        return best[step]
+
+    def mean_hits(
+        self, attackers: t.Sequence[int], defenders: t.Sequence[int]
+    ) -> float:
+        # Mean over every unit pair of the two decks, each with the
+        # attacker's best slot against the defender's full HP.
+        attackers = np.asarray(attackers, dtype=np.intp)
+        defenders = np.asarray(defenders, dtype=np.intp)
+        best = self.hits[np.ix_(attackers, defenders)].min(axis=-1)
+        units = best != NEVER
+        units &= self.damage[attackers].any(axis=-1)[:, None]
+        return float(best[units].mean()) if units.any() else float(NEVER)
+
+
+def _hits(damage: np.ndarray, hp: np.ndarray) -> np.ndarray:
+    # ceil(hp / damage) broadcast, NEVER for no damage
+    safe = np.where(damage > 0, damage, 1)
+    hits = np.minimum(-(-hp // safe), NEVER - 1)
+    return np.where(damage > 0, hits, NEVER).astype(np.uint8)
+
+
+_kill_matrix: t.Optional[KillMatrix] = None
+
+
+def kill_matrix() -> KillMatrix:
+    # one per process, shared by every controller
+    global _kill_matrix
+    if _kill_matrix is None:
+        _kill_matrix = KillMatrix.load()
+    return _kill_matrix
+
+
+class KillController(RandomController):
+    # Attacks with whatever kills the opposing unit in the fewest hits,
+    # otherwise plays like RandomController.
+    def attach(self, battle, seat: int):
+        self.battle = battle
+        self.seat = seat
+        self.matrix = kill_matrix()
+
+    def choose_attack(self, attacks: list[Attack]) -> Attack:
+        fields = self.battle.fields
+        own, opp = fields[self.seat].unit, fields[1 - self.seat].unit
+        if own is None or opp is None:
+            return super().choose_attack(attacks)
+        return attacks[self.matrix.best_slot(own.card.id, opp.hp)]
+
+
+if __name__ == "__main__":
+    main()
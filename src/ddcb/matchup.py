@@ -0,0 +1,201 @@
+import argparse
+import contextlib
+import math
+import os
+import time
+import typing as t
+from dataclasses import dataclass
+from pathlib import Path
+from statistics import NormalDist
+
+from ddcb.base_controller import BaseController, RandomController
+from ddcb.card_db import shared_pool
+from ddcb.field import Deck
+from ddcb.matchup_cache import MatchupCache
+from ddcb.simulate import DEF_CONTROLLER, SimulationResult, load_controller, simulate
+
+DEF_WIDTH = 0.05
+DEF_CONFIDENCE = 0.95
+MIN_BATCH = 100
+MAX_BATCH = 20_000
+
+
+def main():
+    args = parse_args()
+    estimate = estimate_matchup(
+        Deck.from_json(args.deck_one).decklist,
+        Deck.from_json(args.deck_two).decklist,
+        controller=load_controller(args.controller),
+        width=args.width,
+        confidence=args.confidence,
+        max_games=args.max_games,
+        workers=args.workers,
+        seed=args.seed,
+        cache=MatchupCache(args.cache) if args.cache else None,
+    )
+    print_estimate(estimate)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ddcb.matchup",
+        description=(
+            "Estimate the win rate of deck one against deck two, running games "
+            "until the confidence interval is narrow enough."
+        ),
+    )
+    parser.add_argument("deck_one", help="JSON decklist for player one")
+    parser.add_argument("deck_two", help="JSON decklist for player two")
+    parser.add_argument(
+        "--width",
+        type=float,
+        default=DEF_WIDTH,
+        help="stop once the confidence interval is at most this wide",
+    )
+    parser.add_argument("--confidence", type=float, default=DEF_CONFIDENCE)
+    parser.add_argument("--max-games", type=int, default=100_000)
+    parser.add_argument(
+        "-w", "--workers", type=int, default=None, help="defaults to cpu count"
+    )
+    parser.add_argument(
+        "-c",
+        "--controller",
+        default=DEF_CONTROLLER,
+        help="controller class as 'module:ClassName'",
+    )
+    parser.add_argument("-s", "--seed", type=int, default=None)
+    parser.add_argument(
+        "--cache",
+        type=Path,
+        help="SQLite matchup cache to answer from and top up, implies a seed",
+    )
+    return parser.parse_args(argv)
+
+
+def print_estimate(estimate: "MatchupEstimate"):
+    result = estimate.result
+    print(
+        f"win rate: {estimate.score:.4f} "
+        f"[{estimate.low:.4f}, {estimate.high:.4f}] "
+        f"at {estimate.confidence:.0%} confidence"
+    )
+    print(
+        f"games: {result.games} in {estimate.batches} batches "
+        f"(wins: {result.wins} losses: {result.losses} ties: {result.ties})"
+    )
+    print(
+        f"wall time: {estimate.seconds:.2f}s "
+        f"({estimate.games_per_second:.0f} games/s)"
+    )
+    if not estimate.converged:
+        print(f"stopped at the game limit before reaching width {estimate.width}")
+
+
+@dataclass
+class MatchupEstimate:
+    result: SimulationResult
+    confidence: float
+    width: float
+    batches: int = 0
+    seconds: float = 0.0
+
+    @property
+    def score(self):
+        # ties count as half a win
+        games = self.result.games
+        return (self.result.wins + self.result.ties / 2) / games if games else 0.5
+
+    @property
+    def interval(self) -> t.Tuple[float, float]:
+        return wilson_interval(self.score, self.result.games, self.confidence)
+
+    @property
+    def low(self):
+        return self.interval[0]
+
+    @property
+    def high(self):
+        return self.interval[1]
+
+    @property
+    def converged(self):
+        return self.high - self.low <= self.width
+
+    @property
+    def games_per_second(self):
+        return self.result.games / self.seconds if self.seconds else 0.0
+
+
+def wilson_interval(
+    p: float, games: int, confidence: float = DEF_CONFIDENCE
+) -> t.Tuple[float, float]:
+    if games == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    z2 = z * z
+    center = (p + z2 / (2 * games)) / (1 + z2 / games)
+    margin = (
+        z * math.sqrt(p * (1 - p) / games + z2 / (4 * games * games)) / (1 + z2 / games)
+    )
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+def games_needed(p: float, width: float, confidence: float = DEF_CONFIDENCE) -> int:
+    # normal approximation of the games for a 2-sided interval of `width`
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    return math.ceil(p * (1 - p) * (2 * z / width) ** 2)
+
+
+def estimate_matchup(
+    decklist_one: t.List[str],
+    decklist_two: t.List[str],
+    controller: t.Type[BaseController] = RandomController,
+    width: float = DEF_WIDTH,
+    confidence: float = DEF_CONFIDENCE,
+    max_games: int = 100_000,
+    workers: t.Optional[int] = None,
+    seed: t.Optional[int] = None,
+    cache: t.Optional[MatchupCache] = None,
+) -> MatchupEstimate:
+    if cache is not None:
+        # cached results are only reusable for seeded games
+        seed = seed or 0
+    run = cache.simulate if cache is not None else simulate
+    estimate = MatchupEstimate(SimulationResult(), confidence, width)
+    start = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+
+    with contextlib.ExitStack() as stack:
+        # one pool for every batch, starting workers would dominate small ones
+        pool = stack.enter_context(shared_pool(workers)) if workers > 1 else None
+        batch = MIN_BATCH
+        while not estimate.converged and estimate.result.games < max_games:
+            batch = min(batch, max_games - estimate.result.games)
+            estimate.result.merge(
+                run(
+                    decklist_one,
+                    decklist_two,
+                    controller,
+                    batch,
+                    workers=workers,
+                    seed=seed,
+                    first_game=estimate.result.games,
+                    pool=pool,
+                )
+            )
+            estimate.batches += 1
+
+            # size the next batch from the current estimate, lopsided
+            # matchups converge after a batch or two
+            remaining = games_needed(estimate.score, width, confidence)
+            remaining -= estimate.result.games
+            batch = max(MIN_BATCH, min(MAX_BATCH, remaining))
+            # even batches keep who goes first balanced
+            batch += batch % 2
+
+    estimate.seconds = time.perf_counter() - start
+    return estimate
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import typing as t
+from concurrent.futures import Executor
+from array import array
+from collections import Counter
+from pathlib import Path
+
+from ddcb.base_controller import BaseController, RandomController
+from ddcb.battle import ENGINE_VERSION
+from ddcb.card import DEF_CARD_LIST_FILE, CardList
+from ddcb.field import Deck
+from ddcb.simulate import (
+    SimulationResult,
+    controller_spec,
+    load_controller,
+    print_result,
+    simulate,
+)
+
+DEF_CACHE_FILE = (
+    Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    / "ddcb"
+    / "matchups.sqlite3"
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS decks (
+    hash TEXT PRIMARY KEY,
+    decklist TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS matchups (
+    deck_one TEXT NOT NULL,
+    deck_two TEXT NOT NULL,
+    controller TEXT NOT NULL,
+    engine TEXT NOT NULL,
+    seed TEXT NOT NULL,
+    first_game INTEGER NOT NULL,
+    games INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    losses INTEGER NOT NULL,
+    ties INTEGER NOT NULL,
+    PRIMARY KEY (deck_one, deck_two, controller, engine, seed, first_game, games)
+);
+"""
+
+
+def main():
+    args = parse_args()
+    cache = MatchupCache(args.cache)
+    if args.command == "stats":
+        decks, rows, games = cache.stats()
+        print(f"{cache.path}: {decks} decks, {rows} result ranges, {games} games")
+        return
+    result = cache.simulate(
+        Deck.from_json(args.deck_one).decklist,
+        Deck.from_json(args.deck_two).decklist,
+        controller=load_controller(args.controller),
+        games=args.games,
+        seed=args.seed,
+        workers=args.workers,
+    )
+    print_result(result)
+    print(f"simulated {cache.simulated} of {result.games} games, the rest cached")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ddcb.matchup_cache",
+        description="Simulate a matchup, reusing cached results.",
+    )
+    parser.add_argument("--cache", type=Path, default=DEF_CACHE_FILE)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("simulate", help="simulate, topping up the cache")
+    run.add_argument("deck_one", help="JSON decklist for player one")
+    run.add_argument("deck_two", help="JSON decklist for player two")
+    run.add_argument("-n", "--games", type=int, default=1000)
+    run.add_argument("-s", "--seed", type=int, default=0)
+    run.add_argument(
+        "-w", "--workers", type=int, default=None, help="defaults to cpu count"
+    )
+    run.add_argument(
+        "-c",
+        "--controller",
+        default=controller_spec(RandomController),
+        help="controller class as 'module:ClassName'",
+    )
+
+    commands.add_parser("stats", help="summarize the cache")
+    return parser.parse_args(argv)
+
+
+def canonical_deck(decklist: t.Iterable[str]) -> t.Tuple[t.Tuple[int, int], ...]:
+    # (card id, count) pairs sorted by id, the same for any order or spelling
+    # of the decklist's names
+    counts = Counter(card.id for card in CardList().get_cards(decklist))
+    return tuple(sorted(counts.items()))
+
+
+def canonical_decklist(decklist: t.Iterable[str]) -> t.List[str]:
+    # Card names sorted by id. Deck order feeds the seeded shuffle, so decks
+    # with one hash are simulated in this order to give one result.
+    cards = sorted(CardList().get_cards(decklist), key=lambda card: card.id)
+    return [card.name for card in cards]
+
+
+def deck_hash(decklist: t.Iterable[str]) -> str:
+    pairs = array("H", [n for pair in canonical_deck(decklist) for n in pair])
+    return hashlib.blake2b(pairs.tobytes(), digest_size=16).hexdigest()
+
+
+_engine_key: t.Optional[str] = None
+
+
+def engine_key() -> str:
+    # results are only comparable for the same rules and the same card data
+    global _engine_key
+    if _engine_key is None:
+        from ddcb.card_db import hash_file
+
+        _engine_key = f"{ENGINE_VERSION}-{hash_file(DEF_CARD_LIST_FILE).hex()[:16]}"
+    return _engine_key
+
+
+class MatchupCache:
+    # Aggregated results of seeded game ranges. Game k of a seeded run is
+    # always the same game (see simulate), so a request for games
+    # [first, first + n) is answered from stored ranges inside it and only
+    # the gaps between them are simulated, then stored.
+    def __init__(self, path=DEF_CACHE_FILE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        self.db.executescript(SCHEMA)
+        # games simulated by the last simulate() call
+        self.simulated = 0
+
+    def close(self):
+        self.db.close()
+
+    def simulate(
+        self,
+        decklist_one: t.List[str],
+        decklist_two: t.List[str],
+        controller: t.Type[BaseController] = RandomController,
+        games: int = 1000,
+        seed: int = 0,
+        workers: t.Optional[int] = None,
+        first_game: int = 0,
+        pool: t.Optional[Executor] = None,
+    ) -> SimulationResult:
+        decklist_one = canonical_decklist(decklist_one)
+        decklist_two = canonical_decklist(decklist_two)
+        key = self.key(decklist_one, decklist_two, controller, seed)
+        result = SimulationResult()
+        end = first_game + games
+        gaps = []
+        cursor = first_game
+        for start, count, cached in self.ranges(key, first_game, end):
+            if start > cursor:
+                gaps.append((cursor, start - cursor))
+            result.merge(cached)
+            cursor = start + count
+        if cursor < end:
+            gaps.append((cursor, end - cursor))
+
+        self.simulated = 0
+        for gap_first, gap_games in gaps:
+            gap = simulate(
+                decklist_one,
+                decklist_two,
+                controller,
+                gap_games,
+                workers,
+                seed,
+                first_game=gap_first,
+                pool=pool,
+            )
+            self.add(key, gap_first, gap)
+            self.simulated += gap_games
+            result.merge(gap)
+            result.seconds += gap.seconds
+        return result
+
+    def key(
+        self,
+        decklist_one: t.List[str],
+        decklist_two: t.List[str],
+        controller: t.Type[BaseController],
+        seed: int,
+    ) -> t.Tuple[str, str, str, str, str]:
+        hashes = []
+        for decklist in (decklist_one, decklist_two):
+            hashes.append(deck_hash(decklist))
+            with self.db:
+                self.db.execute(
+                    "INSERT OR IGNORE INTO decks VALUES (?, ?)",
+                    (hashes[-1], json.dumps(list(decklist))),
+                )
+        return (*hashes, controller_spec(controller), engine_key(), str(seed))
+
+    def ranges(
+        self, key: tuple, first_game: int, end: int
+    ) -> t.Iterator[t.Tuple[int, int, SimulationResult]]:
+        # stored ranges within [first_game, end) that don't overlap, in order
+        rows = self.db.execute(
+            "SELECT first_game, games, wins, losses, ties FROM matchups "
+            "WHERE deck_one = ? AND deck_two = ? AND controller = ? "
+            "AND engine = ? AND seed = ? "
+            "AND first_game >= ? AND first_game + games <= ? "
+            "ORDER BY first_game, games DESC",
+            (*key, first_game, end),
+        )
+        cursor = first_game
+        for start, count, wins, losses, ties in rows:
+            if start >= cursor:
+                yield start, count, SimulationResult(wins, losses, ties)
+                cursor = start + count
+
+    def add(self, key: tuple, first_game: int, result: SimulationResult):
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO matchups VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    *key,
+                    first_game,
+                    result.games,
+                    result.wins,
+                    result.losses,
+                    result.ties,
+                ),
+            )
+
+    def stats(self) -> t.Tuple[int, int, int]:
+        decks = self.db.execute("SELECT COUNT(*) FROM decks").fetchone()[0]
+        rows, games = self.db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(games), 0) FROM matchups"
+        ).fetchone()
+        return decks, rows, games
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+import math
+import random
+import time
+import typing as t
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from ddcb.base_controller import BaseController
+from ddcb.battle import Battle, BattleResult, BattleState, Step, decision_choices
+from ddcb.field import Deck, Field
+from ddcb.player import Player
+
+
+def main():
+    battle = Battle(
+        Player("mcts", Deck.from_random(), MCTSController(time_budget=0.02)),
+        Player("base", Deck.from_random(), BaseController()),
+    )
+    wins = 0
+    games = 20
+    for game in range(games):
+        wins += battle.battle(first=game % 2) == BattleResult.Win
+    print(f"MCTSController won {wins} of {games} games against BaseController")
+
+
+class Node:
+    # Visit statistics for one decision, indexed like the decision's choices.
+    # Values are from the deciding seat's point of view.
+    __slots__ = ("visits", "counts", "values")
+
+    def __init__(self, choices: int):
+        self.visits = 0
+        self.counts = [0] * choices
+        self.values = [0.0] * choices
+
+    def select(self, exploration: float) -> int:
+        best, best_score = 0, -math.inf
+        log_visits = math.log(self.visits + 1)
+        for i, count in enumerate(self.counts):
+            if count == 0:
+                return i
+            score = self.values[i] / count + exploration * math.sqrt(log_visits / count)
+            if score > best_score:
+                best, best_score = i, score
+        return best
+
+    def update(self, choice: int, reward: float):
+        self.visits += 1
+        self.counts[choice] += 1
+        self.values[choice] += reward
+
+
+class TranspositionTable:
+    # Bounded LRU map of decision key -> Node.
+    def __init__(self, size: int):
+        self.size = size
+        self.nodes: OrderedDict[int, Node] = OrderedDict()
+
+    def get(self, key: int, choices: int) -> t.Optional[Node]:
+        node = self.nodes.get(key)
+        if node is not None:
+            self.nodes.move_to_end(key)
+            if len(node.counts) != choices:
+                # a hash collision, treat the position as new
+                return None
+        return node
+
+    def add(self, key: int, choices: int) -> Node:
+        node = self.nodes[key] = Node(choices)
+        if len(self.nodes) > self.size:
+            self.nodes.popitem(last=False)
+        return node
+
+    def __len__(self):
+        return len(self.nodes)
+
+
+class MCTSController(BaseController):
+    # Monte Carlo Tree Search over the decisions of the attached Battle.
+    # Hidden information (both deck orders, the opponent's hand) is
+    # re-dealt at random on every iteration, and tree nodes are keyed by
+    # what the deciding seat can see, so statistics are shared between
+    # positions that look the same to that player.
+    def __init__(
+        self,
+        time_budget: float = 0.05,
+        iterations: t.Optional[int] = None,
+        exploration: float = 1.4,
+        table_size: int = 100_000,
+        workers: int = 0,
+        seed=None,
+    ):
+        self.time_budget = time_budget
+        self.iterations = iterations
+        self.exploration = exploration
+        self.table = TranspositionTable(table_size)
+        self.workers = workers
+        self.rng = random.Random(seed)
+
+        self.battle: t.Optional[Battle] = None
+        self.seat = 0
+        self._pool: t.Optional[ProcessPoolExecutor] = None
+
+    def attach(self, battle: Battle, seat: int):
+        self.battle = battle
+        self.seat = seat
+
+    def confirm_hand(self):
+        return self.decide(None)
+
+    def choose_unit(self, units):
+        return self.decide(units)
+
+    def choose_dp_booster(self, units):
+        return self.decide(units)
+
+    def choose_evolution(self, units):
+        return self.decide(units)
+
+    def choose_attack(self, attacks):
+        return self.decide(attacks)
+
+    def decide(self, options: t.Optional[list]):
+        battle = self.battle
+        if battle is None:
+            raise Exception("MCTSController is not attached to a Battle.")
+
+        choices = decision_choices(battle.step, options)
+        if len(choices) == 1:
+            return choices[0]
+
+        state = battle.snapshot()
+        if self.workers:
+            counts = self._search_parallel(state)
+        else:
+            with battle.events.paused():
+                counts = search(
+                    battle,
+                    state,
+                    self.seat,
+                    self.table,
+                    self.rng,
+                    self.time_budget,
+                    self.iterations,
+                    self.exploration,
+                )
+            battle.restore(state)
+        return choices[max(range(len(choices)), key=counts.__getitem__)]
+
+    def _search_parallel(self, state: BattleState) -> t.List[int]:
+        # root parallelization: independent searches, visit counts summed
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        decklists = tuple(tuple(f.deck.decklist) for f in self.battle.fields)
+        futures = [
+            self._pool.submit(
+                search_worker,
+                decklists,
+                state,
+                self.seat,
+                self.rng.getrandbits(64),
+                self.time_budget,
+                math.ceil(self.iterations / self.workers) if self.iterations else None,
+                self.exploration,
+            )
+            for _ in range(self.workers)
+        ]
+        totals = None
+        for future in futures:
+            counts = future.result()
+            totals = (
+                counts if totals is None else [a + b for a, b in zip(totals, counts)]
+            )
+        return totals
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+def search(
+    battle: Battle,
+    root: BattleState,
+    seat: int,
+    table: TranspositionTable,
+    rng: random.Random,
+    time_budget: float = 0.05,
+    iterations: t.Optional[int] = None,
+    exploration: float = 1.4,
+) -> t.List[int]:
+    # Returns visit counts of the root decision's choices. Leaves `battle`
+    # in an arbitrary state, restore it afterwards.
+    deadline = time.perf_counter() + time_budget
+    battle.restore(root)
+    battle.next_decision()
+    root_key = observation_key(battle, seat)
+    root_choices = len(decision_choices(battle.step, battle.options))
+
+    iteration = 0
+    while True:
+        battle.restore(root)
+        determinize(battle, seat, rng)
+        path: t.List[t.Tuple[Node, int, int]] = []
+        expanded = False
+
+        while (decider := battle.next_decision()) is not None:
+            choices = decision_choices(battle.step, battle.options)
+            if expanded:
+                choice = rollout_choice(battle.step, choices, rng)
+            else:
+                key = observation_key(battle, decider)
+                node = table.get(key, len(choices))
+                if node is None:
+                    node = table.add(key, len(choices))
+                    expanded = True
+                choice = node.select(exploration)
+                path.append((node, choice, decider))
+            battle.decide(choices[choice])
+
+        for node, choice, decider in path:
+            node.update(choice, reward(battle.result, decider))
+
+        iteration += 1
+        if iterations is not None and iteration >= iterations:
+            break
+        if time.perf_counter() >= deadline:
+            break
+
+    root_node = table.get(root_key, root_choices)
+    return root_node.counts if root_node else [0] * root_choices
+
+
+def determinize(battle: Battle, seat: int, rng: random.Random):
+    # shuffle what `seat` cannot see: its own deck order, and the opponent's
+    # hand and deck together
+    own, opp = battle.fields[seat], battle.fields[1 - seat]
+    rng.shuffle(own.deck.cards)
+    hidden = opp.hand + opp.deck.cards
+    rng.shuffle(hidden)
+    hand_size = len(opp.hand)
+    opp.set_hand(hidden[:hand_size])
+    opp.deck.cards[:] = hidden[hand_size:]
+
+
+def rollout_choice(step: Step, choices: list, rng: random.Random) -> int:
+    if step == Step.CONFIRM_HAND:
+        return 0  # keep, like RandomController
+    return rng.randrange(len(choices))
+
+
+def observation_key(battle: Battle, seat: int) -> int:
+    own, opp = battle.fields[seat], battle.fields[1 - seat]
+    return hash(
+        (
+            battle.step,
+            seat == battle.active,
+            tuple(card.id for card in own.hand),
+            _unit_key(own),
+            len(own.dp.stack),
+            len(own.deck),
+            _unit_key(opp),
+            len(opp.dp.stack),
+            len(opp.hand),
+            len(opp.deck),
+        )
+    )
+
+
+def _unit_key(field: Field):
+    return (field.unit.card.id, field.unit.hp) if field.unit else None
+
+
+def reward(result: BattleResult, seat: int) -> float:
+    if result == BattleResult.Tie:
+        return 0.5
+    won = result == BattleResult.Win
+    return 1.0 if won == (seat == 0) else 0.0
+
+
+_worker_battles: t.Dict[tuple, Battle] = {}
+_worker_table: t.Optional[TranspositionTable] = None
+
+
+def search_worker(
+    decklists: t.Tuple[t.Tuple[str, ...], t.Tuple[str, ...]],
+    state: BattleState,
+    seat: int,
+    seed: int,
+    time_budget: float,
+    iterations: t.Optional[int],
+    exploration: float,
+) -> t.List[int]:
+    global _worker_table
+    battle = _worker_battles.get(decklists)
+    if battle is None:
+        battle = _worker_battles[decklists] = Battle(
+            Player("one", Deck.from_names(list(decklists[0])), BaseController()),
+            Player("two", Deck.from_names(list(decklists[1])), BaseController()),
+        )
+    if _worker_table is None:
+        _worker_table = TranspositionTable(100_000)
+    return list(
+        search(
+            battle,
+            state,
+            seat,
+            _worker_table,
+            random.Random(seed),
+            time_budget,
+            iterations,
+            exploration,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
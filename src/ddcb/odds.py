@@ -0,0 +1,147 @@
+import argparse
+import math
+import random
+import time
+import typing as t
+
+import numpy as np
+
+from ddcb.card import Level
+from ddcb.card_table import LEVELS, CardTable
+from ddcb.field import MAX_HAND_SIZE, Deck, Field
+
+
+def main():
+    args = parse_args()
+    odds = DrawOdds()
+    table = CardTable.from_card_list()
+    decks = [Deck.from_json(path) for path in args.decks]
+    if decks:
+        scores = odds.score(table, table.decks_ids(decks), turn=args.turn)
+        for path, deck, score in zip(args.decks, decks, scores_per_deck(scores)):
+            print(path)
+            for name, value in score.items():
+                print(f"  {name:<26} {value:.4f}")
+            if args.check:
+                opening, mulligans = sample_openings(deck, args.check)
+                print(f"  {'sampled opening unit':<26} {opening:.4f}")
+                print(f"  {'sampled opening mulligans':<26} {mulligans:.4f}")
+
+    if args.bench:
+        rng = random.Random(0)
+        ids = table.decks_ids(Deck.from_random(rng) for _ in range(args.bench))
+        start = time.perf_counter()
+        odds.score(table, ids, turn=args.turn)
+        seconds = time.perf_counter() - start
+        print(f"scored {args.bench} decks in {seconds * 1000:.1f} ms")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ddcb.odds",
+        description="Exact opening hand, opening mulligan and evolution draw odds.",
+    )
+    parser.add_argument("decks", nargs="*", help="JSON decklists")
+    parser.add_argument(
+        "-t", "--turn", type=int, default=3, help="own turn for the evolution odds"
+    )
+    parser.add_argument(
+        "--check", type=int, metavar="N", help="compare with N sampled openings"
+    )
+    parser.add_argument(
+        "--bench", type=int, metavar="N", help="time scoring N random decks"
+    )
+    args = parser.parse_args(argv)
+    if args.turn < 1:
+        parser.error("turns start at 1")
+    return args
+
+
+class DrawOdds:
+    # Hypergeometric odds for a deck of `deck_size` cards. none[K, k] is the
+    # chance that k cards drawn from a deck with K hits hold none of them,
+    # C(N - K, k) / C(N, k), computed exactly once. Every query is then an
+    # index into it, so arrays of counts (one per deck) score in one go.
+    def __init__(self, deck_size: int = Deck.SIZE, hand_size: int = MAX_HAND_SIZE):
+        self.deck_size = deck_size
+        self.hand_size = hand_size
+        n = deck_size
+        self.none = np.array(
+            [
+                [math.comb(n - K, k) / math.comb(n, k) for k in range(n + 1)]
+                for K in range(n + 1)
+            ]
+        )
+        # hands drawn before the deck runs out, each one mulligans when the
+        # cards so far hold no unit
+        self.mulligan_draws = np.arange(hand_size, n, hand_size)
+
+    def p_any(self, hits: np.ndarray, draws) -> np.ndarray:
+        draws = np.clip(draws, 0, self.deck_size)
+        return 1.0 - self.none[hits, draws]
+
+    def p_opening_unit(self, units: np.ndarray) -> np.ndarray:
+        return self.p_any(units, self.hand_size)
+
+    def expected_mulligans(self, units: np.ndarray) -> np.ndarray:
+        # Opening mulligans only, before the first unit is played.
+        # run_confirm_hand auto-mulligans a hand without a unit while cards are
+        # left. The discarded hands held no unit, so the k-th mulligan
+        # happens when the first k hands' cards hold none: the sum of
+        # none[units, k * hand_size] while the deck isn't empty. Every later
+        # turn's hand is confirmed the same way, those mulligans aren't counted.
+        return self.none[np.asarray(units)[..., None], self.mulligan_draws].sum(axis=-1)
+
+    def cards_seen(self, turn, cards_per_turn: int = 1):
+        # The hand is refilled every turn, so after the opening hand every
+        # card played (unit, DP boost, evolution) is replaced by a draw.
+        return self.hand_size + (np.asarray(turn) - 1) * cards_per_turn
+
+    def p_by_turn(self, hits: np.ndarray, turn, cards_per_turn: int = 1) -> np.ndarray:
+        return self.p_any(hits, self.cards_seen(turn, cards_per_turn))
+
+    def score(
+        self, table: CardTable, ids: np.ndarray, turn: int = 3, cards_per_turn: int = 1
+    ) -> t.Dict[str, np.ndarray]:
+        # ids: (decks, deck size) card ids, see CardTable.decks_ids
+        if ids.shape[-1] != self.deck_size:
+            raise Exception(
+                f"Odds are for {self.deck_size} card decks, not {ids.shape[-1]}."
+            )
+        if turn < 1:
+            raise Exception(f"Turns start at 1, not {turn}.")
+        levels = table.level_counts(ids)
+        units = table.unit_counts(ids)
+        champions = levels[..., LEVELS.index(Level.CHAMPION)]
+        ultimates = levels[..., LEVELS.index(Level.ULTIMATE)]
+        return {
+            "opening unit": self.p_opening_unit(units),
+            "opening mulligans": self.expected_mulligans(units),
+            f"champion by turn {turn}": self.p_by_turn(champions, turn, cards_per_turn),
+            f"ultimate by turn {turn}": self.p_by_turn(ultimates, turn, cards_per_turn),
+        }
+
+
+def scores_per_deck(scores: t.Dict[str, np.ndarray]) -> t.Iterator[t.Dict[str, float]]:
+    for i in range(len(next(iter(scores.values())))):
+        yield {name: float(values[i]) for name, values in scores.items()}
+
+
+def sample_openings(deck: Deck, samples: int = 100_000) -> t.Tuple[float, float]:
+    # The same opening played out on a Field, for checking the odds.
+    field = Field(Deck(list(deck.template), random.Random(0)))
+    units = mulligans = 0
+    for _ in range(samples):
+        field.reset()
+        field.deck.shuffle()
+        field.draw_til_full()
+        units += field.has_unit_in_hand()
+        while not field.has_unit_in_hand() and not field.deck.is_empty():
+            field.discard_hand()
+            field.draw_til_full()
+            mulligans += 1
+    return units / samples, mulligans / samples
+
+
+if __name__ == "__main__":
+    main()
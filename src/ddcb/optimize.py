@@ -0,0 +1,294 @@
+import argparse
+import json
+import os
+import random
+import time
+import typing as t
+from collections import Counter
+from concurrent.futures import Executor
+from dataclasses import asdict, dataclass
+from dataclasses import field as dc_field
+from pathlib import Path
+
+from ddcb.base_controller import BaseController
+from ddcb.card import CardList
+from ddcb.card_db import shared_pool
+from ddcb.decklist import write_decklist
+from ddcb.field import Deck
+from ddcb.seeding import derive_seed
+from ddcb.simulate import DEF_CONTROLLER, load_controller, run_shard
+
+MAX_COPIES = 4
+CHECKPOINT_VERSION = 1
+
+# a deck as the sorted names of its cards, so equal decks compare equal
+DeckKey = t.Tuple[str, ...]
+
+
+def main():
+    args = parse_args()
+    config = OptimizerConfig(
+        gauntlet=[Deck.from_json(path).decklist for path in args.gauntlet],
+        pool=load_pool(args.pool),
+        population=args.population,
+        generations=args.generations,
+        games=args.games,
+        max_copies=args.max_copies,
+        seed=args.seed,
+        controller=args.controller,
+    )
+    checkpoint = args.checkpoint or args.out / "checkpoint.json"
+    optimizer = (
+        Optimizer.resume(checkpoint, config.generations)
+        if args.resume and checkpoint.exists()
+        else Optimizer(config)
+    )
+    optimizer.run(workers=args.workers, checkpoint=checkpoint)
+    for path in optimizer.write_best(args.out, args.best):
+        print(f"Wrote {path}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ddcb.optimize",
+        description=(
+            "Search for the deck with the best simulated win rate against a "
+            "gauntlet of opponent decks."
+        ),
+    )
+    parser.add_argument("gauntlet", nargs="+", help="JSON decklists to beat")
+    parser.add_argument(
+        "-o", "--out", type=Path, default=Path("decks"), help="output directory"
+    )
+    parser.add_argument("--pool", help="JSON list of card names, defaults to all")
+    parser.add_argument("--population", type=int, default=32)
+    parser.add_argument("--generations", type=int, default=20)
+    parser.add_argument(
+        "-n", "--games", type=int, default=200, help="games per opponent"
+    )
+    parser.add_argument("--max-copies", type=int, default=MAX_COPIES)
+    parser.add_argument("--best", type=int, default=3, help="decks to write out")
+    parser.add_argument(
+        "-w", "--workers", type=int, default=None, help="defaults to cpu count"
+    )
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument(
+        "-c",
+        "--controller",
+        default=DEF_CONTROLLER,
+        help="controller class as 'module:ClassName'",
+    )
+    parser.add_argument(
+        "--checkpoint", type=Path, help="defaults to checkpoint.json in --out"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue from the checkpoint, with its settings but --generations",
+    )
+    return parser.parse_args(argv)
+
+
+def load_pool(path: t.Optional[str]) -> t.List[str]:
+    if path is None:
+        return sorted({card.name for card in CardList().cards.values()})
+    with open(path, "r") as fp:
+        names = json.load(fp)
+    return sorted({card.name for card in CardList().get_cards(names)})
+
+
+@dataclass
+class OptimizerConfig:
+    gauntlet: t.List[t.List[str]]
+    pool: t.List[str]
+    population: int = 32
+    generations: int = 20
+    games: int = 200
+    max_copies: int = MAX_COPIES
+    seed: int = 0
+    controller: str = DEF_CONTROLLER
+    elites: int = 2
+    tournament: int = 3
+    mutation_rate: float = 0.1
+
+    def __post_init__(self):
+        # fitness is a score per game played
+        if self.games < 1:
+            raise Exception(f"Decks need at least 1 game, not {self.games}.")
+        # filling a deck would never end otherwise
+        if len(self.pool) * self.max_copies < Deck.SIZE:
+            raise Exception(
+                f"A pool of {len(self.pool)} cards with at most {self.max_copies} "
+                f"copies each can't fill a {Deck.SIZE} card deck."
+            )
+
+
+@dataclass
+class Optimizer:
+    # A generational genetic algorithm over decklists. Fitness is the score
+    # (ties count half) against every gauntlet deck. All candidates play the
+    # same seeded games, so differences come from the decks, not the dice.
+    config: OptimizerConfig
+    generation: int = 0
+    population: t.List[DeckKey] = dc_field(default_factory=list)
+    fitness: t.Dict[DeckKey, float] = dc_field(default_factory=dict)
+    rng: random.Random = dc_field(init=False)
+
+    def __post_init__(self):
+        self.rng = random.Random(self.config.seed)
+        self.limit = min(Deck.SIZE, self.config.max_copies)
+
+    def run(
+        self,
+        workers: t.Optional[int] = None,
+        checkpoint: t.Optional[Path] = None,
+    ):
+        workers = workers or os.cpu_count() or 1
+        if not self.population:
+            self.population = [
+                self.random_deck() for _ in range(self.config.population)
+            ]
+        with shared_pool(workers) as pool:
+            while self.generation < self.config.generations:
+                start = time.perf_counter()
+                self.evaluate(self.population, pool)
+                scores = sorted(
+                    (self.fitness[d] for d in self.population), reverse=True
+                )
+                print(
+                    f"generation {self.generation}: best {scores[0]:.4f} "
+                    f"mean {sum(scores) / len(scores):.4f} "
+                    f"({len(self.fitness)} decks evaluated, "
+                    f"{time.perf_counter() - start:.1f}s)"
+                )
+                self.population = self.next_generation()
+                self.generation += 1
+                if checkpoint:
+                    self.save(checkpoint)
+            self.evaluate(self.population, pool)
+
+    def evaluate(self, decks: t.Iterable[DeckKey], pool: Executor):
+        # memoized, only decks never seen before are simulated
+        new = list(dict.fromkeys(d for d in decks if d not in self.fitness))
+        controller = self.config.controller
+        gauntlet = self.config.gauntlet
+        jobs = [
+            (d, gauntlet, self.config.games, self.config.seed, controller) for d in new
+        ]
+        for deck, score in zip(new, pool.map(evaluate_deck, *zip(*jobs))):
+            self.fitness[deck] = score
+
+    def ranked(self) -> t.List[DeckKey]:
+        return sorted(self.fitness, key=self.fitness.__getitem__, reverse=True)
+
+    def next_generation(self) -> t.List[DeckKey]:
+        ranked = sorted(self.population, key=self.fitness.__getitem__, reverse=True)
+        children = ranked[: self.config.elites]
+        while len(children) < self.config.population:
+            child = self.crossover(self.select(), self.select())
+            children.append(self.mutate(child))
+        return children
+
+    def select(self) -> DeckKey:
+        contestants = self.rng.sample(self.population, self.config.tournament)
+        return max(contestants, key=self.fitness.__getitem__)
+
+    def crossover(self, one: DeckKey, two: DeckKey) -> DeckKey:
+        # cards both parents share are kept, the rest is drawn from what
+        # either parent has
+        shared = Counter(one) & Counter(two)
+        rest = list(((Counter(one) | Counter(two)) - shared).elements())
+        self.rng.shuffle(rest)
+        cards = list(shared.elements())
+        counts = Counter(cards)
+        for name in rest:
+            if len(cards) == Deck.SIZE:
+                break
+            if counts[name] < self.limit:
+                cards.append(name)
+                counts[name] += 1
+        return self.fill(cards, counts)
+
+    def mutate(self, deck: DeckKey) -> DeckKey:
+        cards = list(deck)
+        for i in range(len(cards)):
+            if self.rng.random() < self.config.mutation_rate:
+                cards[i] = None
+        cards = [name for name in cards if name is not None]
+        return self.fill(cards, Counter(cards))
+
+    def random_deck(self) -> DeckKey:
+        return self.fill([], Counter())
+
+    def fill(self, cards: t.List[str], counts: Counter) -> DeckKey:
+        while len(cards) < Deck.SIZE:
+            name = self.rng.choice(self.config.pool)
+            if counts[name] < self.limit:
+                cards.append(name)
+                counts[name] += 1
+        return tuple(sorted(cards))
+
+    def write_best(self, out_dir: Path, count: int = 3) -> t.List[Path]:
+        out_dir.mkdir(parents=True, exist_ok=True)
+        paths = []
+        for rank, deck in enumerate(self.ranked()[:count], start=1):
+            path = out_dir / f"best-{rank:02d}.json"
+            write_decklist(list(deck), path)
+            paths.append(path)
+        return paths
+
+    def save(self, path: Path):
+        state = {
+            "version": CHECKPOINT_VERSION,
+            "config": asdict(self.config),
+            "generation": self.generation,
+            "population": self.population,
+            "fitness": [[list(deck), score] for deck, score in self.fitness.items()],
+            "rng": self.rng.getstate(),
+        }
+        # write then rename, an interrupted save keeps the last checkpoint
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w") as fp:
+            json.dump(state, fp)
+        os.replace(tmp, path)
+
+    @classmethod
+    def resume(cls, path: Path, generations: t.Optional[int] = None) -> "Optimizer":
+        with open(path, "r") as fp:
+            state = json.load(fp)
+        if state["version"] != CHECKPOINT_VERSION:
+            raise Exception(f"Unsupported checkpoint version {state['version']}.")
+        config = OptimizerConfig(**state["config"])
+        if generations is not None:
+            config.generations = generations
+        optimizer = cls(
+            config,
+            generation=state["generation"],
+            population=[tuple(deck) for deck in state["population"]],
+            fitness={tuple(deck): score for deck, score in state["fitness"]},
+        )
+        version, internal, gauss = state["rng"]
+        optimizer.rng.setstate((version, tuple(internal), gauss))
+        return optimizer
+
+
+def evaluate_deck(
+    deck: DeckKey,
+    gauntlet: t.List[t.List[str]],
+    games: int,
+    seed: int,
+    controller: str,
+) -> float:
+    controller_cls: t.Type[BaseController] = load_controller(controller)
+    score = 0.0
+    for i, opponent in enumerate(gauntlet):
+        result = run_shard(
+            list(deck), opponent, controller_cls, 0, games, derive_seed(seed, i)
+        )
+        score += (result.wins + result.ties / 2) / result.games
+    return score / len(gauntlet)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,5 +12,8 @@ class Player:
 
     field: Field = dc_field(init=False)
 
+    def __post_init__(self):
+        self.new_field()
+
     def new_field(self):
         self.field = Field(self.deck)
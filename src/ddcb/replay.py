@@ -0,0 +1,281 @@
+import argparse
+import os
+import struct
+import typing as t
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+
+from ddcb.base_controller import BaseController, RandomController
+from ddcb.battle import Battle, BattleResult, choice_index, decision_choices
+from ddcb.card import CardList
+from ddcb.card_db import shared_pool
+from ddcb.field import Deck
+from ddcb.player import Player
+from ddcb.seeding import derive_seed
+from ddcb.simulate import DEF_CONTROLLER, load_controller
+
+# Replay file layout, little endian:
+#   header: magic, version, first player, result, seed, turns,
+#           deck one size, deck two size, decision count
+#   both decks as uint16 card ids, in decklist order
+#   one byte per decision: the index of the choice in decision_choices()
+# The seed reproduces the shuffles, so the decisions are all that's needed.
+MAGIC = b"DDRP"
+VERSION = 1
+HEADER = struct.Struct("<4sBBBxQHHHI")
+SUFFIX = ".replay"
+
+
+def main():
+    args = parse_args()
+    if args.command == "record":
+        paths = record_games(
+            Deck.from_json(args.deck_one).decklist,
+            Deck.from_json(args.deck_two).decklist,
+            args.out,
+            controller=load_controller(args.controller),
+            games=args.games,
+            seed=args.seed,
+        )
+        print(f"recorded {len(paths)} replays in {args.out}")
+    elif args.command == "show":
+        for line in describe(Replay.read(args.path)):
+            print(line)
+    elif args.command == "check":
+        paths = replay_paths(args.path)
+        errors = check_replays(paths, workers=args.workers)
+        for path, error in errors:
+            print(f"{path}: {error}")
+        print(f"{len(paths) - len(errors)} of {len(paths)} replays match")
+        if errors:
+            raise SystemExit(1)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ddcb.replay",
+        description="Record, show and validate battle replays.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record", help="record games between two decks")
+    record.add_argument("deck_one", help="JSON decklist for player one")
+    record.add_argument("deck_two", help="JSON decklist for player two")
+    record.add_argument("out", type=Path, help="directory to write replays to")
+    record.add_argument("-n", "--games", type=int, default=100)
+    record.add_argument("-s", "--seed", type=int, default=0)
+    record.add_argument(
+        "-c",
+        "--controller",
+        default=DEF_CONTROLLER,
+        help="controller class as 'module:ClassName'",
+    )
+
+    show = commands.add_parser("show", help="print the decisions of a replay")
+    show.add_argument("path", type=Path)
+
+    check = commands.add_parser(
+        "check", help="replay a file or directory and compare the outcomes"
+    )
+    check.add_argument("path", type=Path)
+    check.add_argument(
+        "-w", "--workers", type=int, default=None, help="defaults to cpu count"
+    )
+    return parser.parse_args(argv)
+
+
+class ReplayError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Replay:
+    seed: int
+    first: int
+    decks: t.Tuple[t.Tuple[int, ...], t.Tuple[int, ...]]
+    result: BattleResult
+    turns: int
+    choices: bytes
+
+    def to_bytes(self) -> bytes:
+        one, two = self.decks
+        header = HEADER.pack(
+            MAGIC,
+            VERSION,
+            self.first,
+            self.result.value,
+            self.seed,
+            self.turns,
+            len(one),
+            len(two),
+            len(self.choices),
+        )
+        return header + array("H", one + two).tobytes() + self.choices
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Replay":
+        magic, version, first, result, seed, turns, one_size, two_size, count = (
+            HEADER.unpack_from(data)
+        )
+        if magic != MAGIC or version != VERSION:
+            raise ReplayError(f"Not a version {VERSION} replay.")
+        ids_end = HEADER.size + 2 * (one_size + two_size)
+        ids = memoryview(data)[HEADER.size : ids_end].cast("H")
+        choices = bytes(data[ids_end : ids_end + count])
+        if len(choices) != count:
+            raise ReplayError("Replay is truncated.")
+        return cls(
+            seed=seed,
+            first=first,
+            decks=(tuple(ids[:one_size]), tuple(ids[one_size:])),
+            result=BattleResult(result),
+            turns=turns,
+            choices=choices,
+        )
+
+    def write(self, path):
+        Path(path).write_bytes(self.to_bytes())
+
+    @classmethod
+    def read(cls, path) -> "Replay":
+        return cls.from_bytes(Path(path).read_bytes())
+
+    def decklists(self) -> t.List[t.List[str]]:
+        card_list = CardList()
+        try:
+            return [
+                [card_list.get_card_by_id(i).name for i in deck] for deck in self.decks
+            ]
+        except KeyError as e:
+            raise ReplayError(f"Unknown card id {e}.")
+
+    def new_battle(self) -> Battle:
+        # controllers are never asked during a replay
+        one, two = self.decklists()
+        return Battle(
+            Player("one", Deck.from_names(one), BaseController()),
+            Player("two", Deck.from_names(two), BaseController()),
+        )
+
+
+def record(battle: Battle, seed: int, first: t.Optional[int] = None) -> Replay:
+    # Play one seeded game, asking the controllers as Battle.run() would,
+    # and keep the index of every answer.
+    battle.seed(seed)
+    battle.reset(first)
+    first = battle.active
+    choices = bytearray()
+    while battle.next_decision() is not None:
+        spec = battle.STEPS[battle.step]
+        choice = spec.ask(battle.decider().controller, battle.options)
+        choices.append(
+            choice_index(decision_choices(battle.step, battle.options), choice)
+        )
+        battle.decide(choice)
+
+    return Replay(
+        seed=seed,
+        first=first,
+        decks=tuple(tuple(f.deck.card_ids()) for f in battle.fields),
+        result=battle.result,
+        turns=battle.turn,
+        choices=bytes(choices),
+    )
+
+
+def replay(rec: Replay, battle: t.Optional[Battle] = None) -> Battle:
+    # Re-run a recorded game without asking any controller. `battle` must
+    # be playing the replay's decks.
+    battle = battle or rec.new_battle()
+    battle.seed(rec.seed)
+    battle.reset(rec.first)
+    for index in rec.choices:
+        if battle.next_decision() is None:
+            raise ReplayError("The game ended before the replay's last decision.")
+        battle.decide(decision_choices(battle.step, battle.options)[index])
+    if battle.next_decision() is not None:
+        raise ReplayError("The game needs more decisions than the replay has.")
+    return battle
+
+
+def validate(rec: Replay) -> t.Optional[str]:
+    try:
+        battle = replay(rec)
+    except (ReplayError, IndexError) as e:
+        return str(e) or type(e).__name__
+    if battle.result != rec.result or battle.turn != rec.turns:
+        return (
+            f"replayed {battle.result.name} after {battle.turn} turns, "
+            f"recorded {rec.result.name} after {rec.turns} turns"
+        )
+    return None
+
+
+def describe(rec: Replay) -> t.Iterator[str]:
+    yield f"seed {rec.seed}, player {rec.first + 1} goes first"
+    battle = rec.new_battle()
+    battle.seed(rec.seed)
+    battle.reset(rec.first)
+    for index in rec.choices:
+        seat = battle.next_decision()
+        choice = decision_choices(battle.step, battle.options)[index]
+        name = getattr(choice, "name", choice)
+        yield f"turn {battle.turn} player {seat + 1} {battle.step.name}: {name}"
+        battle.decide(choice)
+    yield f"player one {rec.result.name} after {rec.turns} turns"
+
+
+def record_games(
+    decklist_one: t.List[str],
+    decklist_two: t.List[str],
+    out_dir,
+    controller: t.Type[BaseController] = RandomController,
+    games: int = 100,
+    seed: int = 0,
+) -> t.List[Path]:
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    battle = Battle(
+        Player("one", Deck.from_names(decklist_one), controller()),
+        Player("two", Deck.from_names(decklist_two), controller()),
+    )
+    paths = []
+    for game in range(games):
+        rec = record(battle, derive_seed(seed, game), first=game % 2)
+        path = out_dir / f"game-{game:06d}{SUFFIX}"
+        rec.write(path)
+        paths.append(path)
+    return paths
+
+
+def replay_paths(path) -> t.List[Path]:
+    path = Path(path)
+    if path.is_dir():
+        return sorted(path.glob(f"*{SUFFIX}"))
+    return [path]
+
+
+def check_replays(
+    paths: t.Sequence[Path], workers: t.Optional[int] = None
+) -> t.List[t.Tuple[Path, str]]:
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        results = map(check_file, paths)
+    else:
+        with shared_pool(workers) as pool:
+            chunksize = max(1, len(paths) // (workers * 4))
+            results = list(pool.map(check_file, paths, chunksize=chunksize))
+    return [(path, error) for path, error in zip(paths, results) if error]
+
+
+def check_file(path: Path) -> t.Optional[str]:
+    try:
+        rec = Replay.read(path)
+    except (OSError, ReplayError, struct.error, ValueError) as e:
+        return str(e)
+    return validate(rec)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+import hashlib
+import random
+import typing as t
+
+# Anything with the random.Random interface. The random module itself is the
+# default everywhere, so unseeded code keeps using the shared global stream.
+RNG = t.Any
+
+
+def main():
+    seed = 1234
+    for game in range(4):
+        print(f"game {game}: seed {derive_seed(seed, game)}")
+
+
+def derive_seed(seed: int, *keys: int) -> int:
+    # Stable 64 bit child seed of `seed` for `keys`, e.g. (game,) or
+    # (game, stream). Unlike hash() it is the same in every process.
+    data = repr((seed, *keys)).encode()
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+def derive_rng(seed: int, *keys: int) -> random.Random:
+    return random.Random(derive_seed(seed, *keys))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+import argparse
+import bisect
+import json
+import os
+import typing as t
+from pathlib import Path
+
+import numpy as np
+
+from ddcb.base_controller import BaseController
+from ddcb.battle import Battle, BattleResult, choice_index, decision_choices
+from ddcb.card import Level
+from ddcb.card_db import shared_pool
+from ddcb.field import MAX_HAND_SIZE, NO_CARD, Deck
+from ddcb.player import Player
+from ddcb.seeding import derive_seed
+from ddcb.simulate import DEF_CONTROLLER, load_controller, split_games
+
+MANIFEST = "manifest.json"
+MANIFEST_VERSION = 1
+DTYPE = np.int32
+DEF_SHARD_ROWS = 1 << 16
+
+# One row per decision, seen by the deciding seat. Cards are ids, NO_CARD
+# for an empty slot; levels index list(Level); `action` indexes the
+# decision_choices() of the step, `choices` is how many there were.
+# `result` is the game's BattleResult value for the deciding seat.
+COLUMNS = (
+    "game",
+    "turn",
+    "seat",
+    "step",
+    *(f"hand_{i}" for i in range(MAX_HAND_SIZE)),
+    "unit",
+    "unit_hp",
+    "unit_level",
+    "unit_c",
+    "unit_t",
+    "unit_x",
+    "dp",
+    "deck",
+    "opponent_unit",
+    "opponent_hp",
+    "opponent_deck",
+    "choices",
+    "action",
+    "result",
+)
+# where each group of columns starts, encode() and play_shard() write by
+# these so the layout above is the only place it's spelled out
+HAND = COLUMNS.index("hand_0")
+UNIT = COLUMNS.index("unit")
+DP = COLUMNS.index("dp")
+OPPONENT = COLUMNS.index("opponent_unit")
+CHOICES = COLUMNS.index("choices")
+ACTION = COLUMNS.index("action")
+RESULT = COLUMNS.index("result")
+LEVEL_INDEX = {level: i for i, level in enumerate(Level)}
+
+
+def main():
+    args = parse_args()
+    path = generate(
+        Deck.from_json(args.deck_one).decklist,
+        Deck.from_json(args.deck_two).decklist,
+        args.out,
+        controller=args.controller,
+        games=args.games,
+        workers=args.workers,
+        seed=args.seed,
+        shard_rows=args.shard_rows,
+    )
+    dataset = Dataset(path)
+    print(f"{len(dataset)} decisions in {len(dataset.ends)} shards, see {path}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ddcb.selfplay",
+        description="Write the decisions of self-play games as sharded .npy files.",
+    )
+    parser.add_argument("deck_one", help="JSON decklist for player one")
+    parser.add_argument("deck_two", help="JSON decklist for player two")
+    parser.add_argument("out", type=Path, help="directory for shards and manifest")
+    parser.add_argument("-n", "--games", type=int, default=10000)
+    parser.add_argument(
+        "-w", "--workers", type=int, default=None, help="defaults to cpu count"
+    )
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument(
+        "-c",
+        "--controller",
+        default=DEF_CONTROLLER,
+        help="controller class as 'module:ClassName'",
+    )
+    parser.add_argument(
+        "--shard-rows",
+        type=int,
+        default=DEF_SHARD_ROWS,
+        help="decisions per shard, bounds each worker's memory",
+    )
+    return parser.parse_args(argv)
+
+
+def encode(battle: Battle, seat: int, game: int, row: np.ndarray):
+    own, opp = battle.fields[seat], battle.fields[1 - seat]
+    row[:HAND] = (game, battle.turn, seat, battle.step)
+    hand = [card.id for card in own.hand]
+    row[HAND:UNIT] = hand + [NO_CARD] * (MAX_HAND_SIZE - len(hand))
+    if own.unit:
+        card = own.unit.card
+        row[UNIT:DP] = (
+            card.id,
+            own.unit.hp,
+            LEVEL_INDEX[card.level],
+            card.c_attack.damage,
+            card.t_attack.damage,
+            card.x_attack.damage,
+        )
+    else:
+        row[UNIT:DP] = (NO_CARD, 0, NO_CARD, 0, 0, 0)
+    row[DP:OPPONENT] = (own.dp.get_value(), len(own.deck))
+    row[OPPONENT:CHOICES] = (
+        opp.unit.card.id if opp.unit else NO_CARD,
+        opp.unit.hp if opp.unit else 0,
+        len(opp.deck),
+    )
+
+
+class ShardWriter:
+    # Buffers rows and writes a full buffer out as the next shard, so a
+    # worker holds at most `shard_rows` rows whatever the number of games.
+    def __init__(self, out_dir: Path, prefix: str, shard_rows: int = DEF_SHARD_ROWS):
+        self.out_dir = out_dir
+        self.prefix = prefix
+        self.buffer = np.empty((shard_rows, len(COLUMNS)), dtype=DTYPE)
+        self.rows = 0
+        self.shards: t.List[t.Dict[str, t.Any]] = []
+
+    def write(self, rows: np.ndarray):
+        while len(rows):
+            room = len(self.buffer) - self.rows
+            self.buffer[self.rows : self.rows + min(room, len(rows))] = rows[:room]
+            self.rows += min(room, len(rows))
+            rows = rows[room:]
+            if self.rows == len(self.buffer):
+                self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        name = f"{self.prefix}-{len(self.shards):04d}.npy"
+        np.save(self.out_dir / name, self.buffer[: self.rows])
+        self.shards.append({"path": name, "rows": self.rows})
+        self.rows = 0
+
+
+def play_shard(
+    decklist_one: t.List[str],
+    decklist_two: t.List[str],
+    out_dir: Path,
+    controller: str,
+    first_game: int,
+    count: int,
+    seed: int,
+    shard_rows: int = DEF_SHARD_ROWS,
+) -> t.List[t.Dict[str, t.Any]]:
+    # Games [first_game, first_game + count), seeded and alternating who
+    # goes first like simulate.run_shard.
+    controller_cls: t.Type[BaseController] = load_controller(controller)
+    battle = Battle(
+        Player("one", Deck.from_names(decklist_one), controller_cls()),
+        Player("two", Deck.from_names(decklist_two), controller_cls()),
+    )
+    writer = ShardWriter(Path(out_dir), f"games-{first_game:08d}", shard_rows)
+    # one game's rows, grown as needed; results are filled in at the end
+    game_rows = np.empty((64, len(COLUMNS)), dtype=DTYPE)
+    seats: t.List[int] = []
+    for game in range(first_game, first_game + count):
+        battle.seed(derive_seed(seed, game))
+        battle.reset(first=game % 2)
+        seats.clear()
+        while (seat := battle.next_decision()) is not None:
+            if len(seats) == len(game_rows):
+                game_rows = np.resize(game_rows, (2 * len(game_rows), len(COLUMNS)))
+            row = game_rows[len(seats)]
+            encode(battle, seat, game, row)
+            spec = battle.STEPS[battle.step]
+            choice = spec.ask(battle.players[seat].controller, battle.options)
+            choices = decision_choices(battle.step, battle.options)
+            row[CHOICES] = len(choices)
+            row[ACTION] = choice_index(choices, choice)
+            seats.append(seat)
+            battle.decide(choice)
+
+        rows = game_rows[: len(seats)]
+        results = (battle.result.value, battle.result.flip().value)
+        rows[:, RESULT] = np.take(results, seats)
+        writer.write(rows)
+    writer.flush()
+    return writer.shards
+
+
+def generate(
+    decklist_one: t.List[str],
+    decklist_two: t.List[str],
+    out_dir: Path,
+    controller: str = DEF_CONTROLLER,
+    games: int = 10000,
+    workers: t.Optional[int] = None,
+    seed: int = 0,
+    shard_rows: int = DEF_SHARD_ROWS,
+) -> Path:
+    # Every worker writes its own shards, the manifest lists them in game
+    # order once all are done.
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    jobs = [
+        (decklist_one, decklist_two, out_dir, controller, first, n, seed, shard_rows)
+        for first, n in split_games(games, workers * 4)
+    ]
+    if workers == 1:
+        shards = [play_shard(*job) for job in jobs]
+    else:
+        with shared_pool(workers) as pool:
+            shards = list(pool.map(play_shard, *zip(*jobs)))
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "columns": list(COLUMNS),
+        "dtype": np.dtype(DTYPE).str,
+        "levels": [level.name for level in Level],
+        "results": {result.name: result.value for result in BattleResult},
+        "decks": [decklist_one, decklist_two],
+        "controller": controller,
+        "seed": seed,
+        "games": games,
+        "shards": [shard for job_shards in shards for shard in job_shards],
+    }
+    path = out_dir / MANIFEST
+    path.write_text(json.dumps(manifest, indent=2))
+    return path
+
+
+class Dataset:
+    # Lazy view of a generated dataset: shards are memory-mapped on first
+    # use, rows are indexed across all of them.
+    def __init__(self, manifest_path):
+        manifest_path = Path(manifest_path)
+        self.manifest = json.loads(manifest_path.read_text())
+        if self.manifest["version"] != MANIFEST_VERSION:
+            raise Exception(f"Unsupported dataset version in {manifest_path}.")
+        self.dir = manifest_path.parent
+        self.columns = {name: i for i, name in enumerate(self.manifest["columns"])}
+        self.ends = list(
+            np.cumsum([shard["rows"] for shard in self.manifest["shards"]])
+        )
+        self._shards: t.Dict[int, np.ndarray] = {}
+
+    def __len__(self):
+        return int(self.ends[-1]) if self.ends else 0
+
+    def shard(self, i: int) -> np.ndarray:
+        if i not in self._shards:
+            path = self.dir / self.manifest["shards"][i]["path"]
+            self._shards[i] = np.load(path, mmap_mode="r")
+        return self._shards[i]
+
+    def shards(self) -> t.Iterator[np.ndarray]:
+        for i in range(len(self.ends)):
+            yield self.shard(i)
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        if index < 0:
+            index += len(self)
+        i = bisect.bisect_right(self.ends, index)
+        start = self.ends[i - 1] if i else 0
+        return self.shard(i)[index - start]
+
+    def column(self, name: str) -> t.Iterator[np.ndarray]:
+        # per shard, so a column of a large dataset doesn't have to fit at once
+        for shard in self.shards():
+            yield shard[:, self.columns[name]]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,388 @@
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+import typing as t
+from array import array
+from pathlib import Path
+
+from ddcb.async_controller import AsyncAdapter, AsyncController, play
+from ddcb.base_controller import BaseController
+from ddcb.battle import Battle, decision_choices
+from ddcb.field import Deck
+from ddcb.instrument import PERCENTILES, latency_stats
+from ddcb.player import Player
+from ddcb.seeding import derive_seed
+from ddcb.simulate import DEF_CONTROLLER, load_controller
+
+# Line delimited JSON, one object per line:
+#   client: {"type": "new", "deck": [names]}     deck optional, random if left out
+#   server: {"type": "decision", "id": n, "step": name, "turn": n,
+#            "state": {...}, "options": [names]}
+#   client: {"type": "choice", "id": n, "index": i}
+#   server: {"type": "result", "result": "Win", "turns": n, "timeouts": n}
+#   server: {"type": "error", "message": text}, then closes
+# Options are indexed like decision_choices(), a pass is null. Replies to a
+# decision that already timed out are ignored by id.
+DEF_HOST = "127.0.0.1"
+DEF_PORT = 7777
+DEF_TIMEOUT = 30.0
+
+
+def main():
+    args = parse_args()
+    if args.command == "serve":
+        server = MatchServer(
+            load_controller(args.controller),
+            timeout=args.timeout,
+            seed=args.seed,
+        )
+        asyncio.run(server.serve_forever(args.host, args.port, args.unix))
+    else:
+        stats = asyncio.run(
+            load_test(
+                args.matches,
+                args.concurrency,
+                host=args.host,
+                port=args.port,
+                unix=args.unix,
+                local=not args.connect,
+            )
+        )
+        print_load_stats(stats)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ddcb.server",
+        description="Host battles for remote players over TCP or a Unix socket.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="play every connection against a bot")
+    load = commands.add_parser("load", help="measure a server with random players")
+    for command in (serve, load):
+        command.add_argument("--host", default=DEF_HOST)
+        command.add_argument("--port", type=int, default=DEF_PORT)
+        command.add_argument("--unix", type=Path, help="listen on a Unix socket")
+
+    serve.add_argument(
+        "-c",
+        "--controller",
+        default=DEF_CONTROLLER,
+        help="the bot's controller class as 'module:ClassName'",
+    )
+    serve.add_argument(
+        "-t",
+        "--timeout",
+        type=float,
+        default=DEF_TIMEOUT,
+        help="seconds per decision before the default choice is made",
+    )
+    serve.add_argument("-s", "--seed", type=int, default=None)
+
+    load.add_argument("-n", "--matches", type=int, default=2000)
+    load.add_argument("-C", "--concurrency", type=int, default=500)
+    load.add_argument(
+        "--connect",
+        action="store_true",
+        help="use a running server instead of one in this process",
+    )
+    return parser.parse_args(argv)
+
+
+class ProtocolError(Exception):
+    pass
+
+
+async def send(writer: asyncio.StreamWriter, message: dict):
+    writer.write(json.dumps(message).encode() + b"\n")
+    await writer.drain()
+
+
+async def receive(reader: asyncio.StreamReader) -> t.Optional[dict]:
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        message = json.loads(line)
+    except ValueError:
+        message = None
+    if not isinstance(message, dict):
+        raise ProtocolError("Messages must be JSON objects, one per line.")
+    return message
+
+
+def choice_name(choice) -> t.Optional[str]:
+    if choice is None:
+        return None
+    return getattr(choice, "name", str(choice))
+
+
+class RemoteController(AsyncController):
+    # Sends each decision over the connection and waits for the index of
+    # the answer. The battle says which step is asking.
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.requests = 0
+
+    def attach(self, battle: Battle, seat: int):
+        self.battle = battle
+        self.seat = seat
+
+    async def request(self):
+        battle = self.battle
+        choices = decision_choices(battle.step, battle.options)
+        self.requests += 1
+        await send(
+            self.writer,
+            {
+                "type": "decision",
+                "id": self.requests,
+                "step": battle.step.name,
+                "turn": battle.turn,
+                "state": self.state(),
+                "options": [choice_name(c) for c in choices],
+            },
+        )
+        while True:
+            message = await receive(self.reader)
+            if message is None:
+                raise ProtocolError("The player disconnected.")
+            if message.get("type") != "choice" or message.get("id") != self.requests:
+                # a late answer to a decision that timed out
+                continue
+            index = message.get("index")
+            if not isinstance(index, int) or not 0 <= index < len(choices):
+                raise ProtocolError(f"No choice {index} in {len(choices)} options.")
+            return choices[index]
+
+    def state(self) -> dict:
+        own = self.battle.fields[self.seat]
+        opp = self.battle.fields[1 - self.seat]
+        return {
+            "hand": [card.name for card in own.hand],
+            "deck": len(own.deck),
+            "dp": own.dp.get_value(),
+            "unit": own.unit.card.name if own.unit else None,
+            "hp": own.unit.hp if own.unit else 0,
+            "opponent_unit": opp.unit.card.name if opp.unit else None,
+            "opponent_hp": opp.unit.hp if opp.unit else 0,
+        }
+
+    async def confirm_hand(self):
+        return await self.request()
+
+    async def choose_unit(self, units):
+        return await self.request()
+
+    async def choose_dp_booster(self, units):
+        return await self.request()
+
+    async def choose_evolution(self, units):
+        return await self.request()
+
+    async def choose_attack(self, attacks):
+        return await self.request()
+
+
+class MatchServer:
+    # Every connection plays its matches against a bot, one at a time. All
+    # matches share the event loop: a match only yields while it waits for
+    # its player, so thousands of them fit in one process.
+    def __init__(
+        self,
+        controller: t.Type[BaseController],
+        timeout: t.Optional[float] = DEF_TIMEOUT,
+        seed: t.Optional[int] = None,
+    ):
+        self.controller = controller
+        self.timeout = timeout
+        self.seed = seed
+        self.matches = 0
+        self.active = 0
+
+    async def serve_forever(
+        self,
+        host: str = DEF_HOST,
+        port: int = DEF_PORT,
+        unix: t.Optional[Path] = None,
+    ):
+        server = await self.start(host, port, unix)
+        print(f"serving on {unix or f'{host}:{port}'}")
+        async with server:
+            await server.serve_forever()
+
+    async def start(
+        self,
+        host: str = DEF_HOST,
+        port: int = DEF_PORT,
+        unix: t.Optional[Path] = None,
+    ) -> asyncio.AbstractServer:
+        if unix:
+            return await asyncio.start_unix_server(self.handle, unix, backlog=4096)
+        return await asyncio.start_server(self.handle, host, port, backlog=4096)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.active += 1
+        try:
+            while (message := await receive(reader)) is not None:
+                if message.get("type") != "new":
+                    raise ProtocolError("Start a match with a 'new' message.")
+                await self.play_match(message, reader, writer)
+        except (ProtocolError, KeyError) as e:
+            try:
+                await send(writer, {"type": "error", "message": str(e)})
+            except ConnectionError:
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            self.active -= 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def play_match(
+        self,
+        message: dict,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ):
+        names = message.get("deck")
+        if names is None:
+            deck = Deck.from_random()
+        else:
+            if (
+                not isinstance(names, list)
+                or len(names) != Deck.SIZE
+                or not all(isinstance(name, str) for name in names)
+            ):
+                raise ProtocolError(f"A deck is a list of {Deck.SIZE} card names.")
+            try:
+                deck = Deck.from_names(names)
+            except KeyError as e:
+                raise ProtocolError(f"Unknown card {e}.")
+        bot = self.controller()
+        battle = Battle(
+            Player("remote", deck, BaseController()),
+            Player("bot", Deck.from_random(), bot),
+        )
+        if self.seed is not None:
+            battle.seed(derive_seed(self.seed, self.matches))
+        self.matches += 1
+
+        timeouts = 0
+
+        def on_timeout(seat: int):
+            nonlocal timeouts
+            timeouts += seat == 0
+
+        remote = RemoteController(reader, writer)
+        result = await play(
+            battle, [remote, AsyncAdapter(bot)], self.timeout, on_timeout=on_timeout
+        )
+        await send(
+            writer,
+            {
+                "type": "result",
+                "result": result.name,
+                "turns": battle.turn,
+                "timeouts": timeouts,
+            },
+        )
+
+
+class LoadStats(t.NamedTuple):
+    matches: int
+    decisions: int
+    seconds: float
+    # server turnaround, from sending a choice to the next decision
+    latency_ns: array
+
+    @property
+    def matches_per_second(self):
+        return self.matches / self.seconds
+
+
+async def load_test(
+    matches: int,
+    concurrency: int,
+    host: str = DEF_HOST,
+    port: int = DEF_PORT,
+    unix: t.Optional[Path] = None,
+    local: bool = True,
+) -> LoadStats:
+    # `concurrency` connections play random choices until `matches` are
+    # done. With `local`, a server on a temporary Unix socket in this event
+    # loop stands in for a real one.
+    server = None
+    tmp = None
+    if local:
+        tmp = tempfile.TemporaryDirectory()
+        unix = Path(tmp.name) / "ddcb.sock"
+        server = await MatchServer(BaseController, timeout=None).start(unix=unix)
+
+    remaining = [matches]
+    latency_ns = array("q")
+    decisions = [0]
+
+    async def client(seed: int):
+        rng = random.Random(seed)
+        if unix:
+            reader, writer = await asyncio.open_unix_connection(unix)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while remaining[0] > 0:
+                remaining[0] -= 1
+                await send(writer, {"type": "new"})
+                sent = None
+                while (message := await receive(reader))["type"] == "decision":
+                    now = time.perf_counter_ns()
+                    if sent is not None:
+                        latency_ns.append(now - sent)
+                    decisions[0] += 1
+                    index = rng.randrange(len(message["options"]))
+                    sent = time.perf_counter_ns()
+                    await send(
+                        writer, {"type": "choice", "id": message["id"], "index": index}
+                    )
+                if message["type"] == "error":
+                    raise ProtocolError(message["message"])
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(client(i) for i in range(min(concurrency, matches))))
+    finally:
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+            tmp.cleanup()
+    return LoadStats(matches, decisions[0], time.perf_counter() - start, latency_ns)
+
+
+def print_load_stats(stats: LoadStats):
+    print(
+        f"{stats.matches} matches, {stats.decisions} decisions "
+        f"in {stats.seconds:.2f}s: {stats.matches_per_second:.0f} matches/s"
+    )
+    if stats.latency_ns:
+        latency = latency_stats(stats.latency_ns)
+        print(
+            "decision latency "
+            + " ".join(f"p{p} {latency[f'p{p}_ns'] / 1e6:.2f}ms" for p in PERCENTILES)
+            + f" max {latency['max_ns'] / 1e6:.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import argparse
+import importlib
+import os
+import time
+import typing as t
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from dataclasses import field as dc_field
+
+from ddcb.base_controller import BaseController, RandomController
+from ddcb.battle import Battle, BattleResult
+from ddcb.card_db import shared_pool
+from ddcb.field import Deck
+from ddcb.player import Player
+from ddcb.seeding import derive_seed
+
+DEF_CONTROLLER = "ddcb.base_controller:RandomController"
+
+
+def main():
+    args = parse_args()
+    result = simulate(
+        Deck.from_json(args.deck_one).decklist,
+        Deck.from_json(args.deck_two).decklist,
+        controller=load_controller(args.controller),
+        games=args.games,
+        workers=args.workers,
+        seed=args.seed,
+    )
+    print_result(result)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ddcb.simulate",
+        description="Run headless battles between two decklists.",
+    )
+    parser.add_argument("deck_one", help="JSON decklist for player one")
+    parser.add_argument("deck_two", help="JSON decklist for player two")
+    parser.add_argument("-n", "--games", type=int, default=1000)
+    parser.add_argument(
+        "-w", "--workers", type=int, default=None, help="defaults to cpu count"
+    )
+    parser.add_argument(
+        "-c",
+        "--controller",
+        default=DEF_CONTROLLER,
+        help="controller class as 'module:ClassName'",
+    )
+    parser.add_argument(
+        "-s",
+        "--seed",
+        type=int,
+        default=None,
+        help="makes every game reproducible, whatever the worker count",
+    )
+    return parser.parse_args(argv)
+
+
+def load_controller(spec: str) -> t.Type[BaseController]:
+    module_name, _, class_name = spec.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def controller_spec(controller: t.Type[BaseController]) -> str:
+    return f"{controller.__module__}:{controller.__qualname__}"
+
+
+def print_result(result: "SimulationResult"):
+    print(
+        f"games: {result.games} "
+        f"wins: {result.wins} losses: {result.losses} ties: {result.ties}"
+    )
+    print(f"win rate: {result.win_rate:.4f}")
+    print(f"wall time: {result.seconds:.2f}s ({result.games_per_second:.0f} games/s)")
+    for worker in result.workers:
+        print(
+            f"  worker {worker.pid}: {worker.games} games "
+            f"in {worker.seconds:.2f}s ({worker.games_per_second:.0f} games/s)"
+        )
+
+
+@dataclass
+class WorkerStats:
+    pid: int
+    games: int = 0
+    seconds: float = 0.0
+
+    @property
+    def games_per_second(self):
+        return self.games / self.seconds if self.seconds else 0.0
+
+
+@dataclass
+class SimulationResult:
+    wins: int = 0
+    losses: int = 0
+    ties: int = 0
+    seconds: float = 0.0
+    workers: t.List[WorkerStats] = dc_field(default_factory=list)
+
+    @property
+    def games(self):
+        return self.wins + self.losses + self.ties
+
+    @property
+    def win_rate(self):
+        return self.wins / self.games if self.games else 0.0
+
+    @property
+    def games_per_second(self):
+        return self.games / self.seconds if self.seconds else 0.0
+
+    def add(self, result: BattleResult):
+        if result == BattleResult.Win:
+            self.wins += 1
+        elif result == BattleResult.Loss:
+            self.losses += 1
+        else:
+            self.ties += 1
+
+    def merge(self, other: "SimulationResult"):
+        self.wins += other.wins
+        self.losses += other.losses
+        self.ties += other.ties
+        for stats in other.workers:
+            self._worker(stats.pid).games += stats.games
+            self._worker(stats.pid).seconds += stats.seconds
+
+    def _worker(self, pid: int):
+        for stats in self.workers:
+            if stats.pid == pid:
+                return stats
+        stats = WorkerStats(pid)
+        self.workers.append(stats)
+        return stats
+
+
+def simulate(
+    decklist_one: t.List[str],
+    decklist_two: t.List[str],
+    controller: t.Type[BaseController] = RandomController,
+    games: int = 1000,
+    workers: t.Optional[int] = None,
+    seed: t.Optional[int] = None,
+    first_game: int = 0,
+    pool: t.Optional[Executor] = None,
+) -> SimulationResult:
+    # Game k is seeded with derive_seed(seed, k), so a seeded run gives the
+    # same games however they are sharded. first_game continues a run.
+    # Callers running many small batches pass their own `pool` (see
+    # shared_pool) so workers aren't started again for each one.
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    result = SimulationResult()
+
+    # a few shards per worker keeps the pool busy when some games run long
+    shards = split_games(games, workers * 4)
+    jobs = [
+        (decklist_one, decklist_two, controller, first_game + s, n, seed)
+        for s, n in shards
+    ]
+    if pool is not None:
+        for shard_result in pool.map(run_shard, *zip(*jobs)):
+            result.merge(shard_result)
+    elif workers == 1:
+        for job in jobs:
+            result.merge(run_shard(*job))
+    else:
+        with shared_pool(workers) as pool:
+            for shard_result in pool.map(run_shard, *zip(*jobs)):
+                result.merge(shard_result)
+
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def split_games(games: int, shards: int) -> t.List[t.Tuple[int, int]]:
+    shards = max(1, min(shards, games))
+    size, extra = divmod(games, shards)
+    splits = []
+    first = 0
+    for i in range(shards):
+        count = size + (i < extra)
+        splits.append((first, count))
+        first += count
+    return splits
+
+
+def run_shard(
+    decklist_one: t.List[str],
+    decklist_two: t.List[str],
+    controller: t.Type[BaseController],
+    first_game: int,
+    count: int,
+    seed: t.Optional[int] = None,
+) -> SimulationResult:
+    start = time.perf_counter()
+    result = SimulationResult()
+
+    battle = Battle(
+        Player("one", Deck.from_names(decklist_one), controller()),
+        Player("two", Deck.from_names(decklist_two), controller()),
+    )
+    for game in range(first_game, first_game + count):
+        # alternate who goes first so neither deck gets the tempo edge
+        game_seed = None if seed is None else derive_seed(seed, game)
+        result.add(battle.battle(first=game % 2, seed=game_seed))
+
+    result.workers.append(WorkerStats(os.getpid(), count, time.perf_counter() - start))
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+import argparse
+import csv
+import os
+import typing as t
+from concurrent.futures import (
+    ALL_COMPLETED,
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass
+from itertools import combinations
+from pathlib import Path
+
+from ddcb.card_db import shared_pool
+from ddcb.field import Deck
+from ddcb.matchup_cache import canonical_decklist, deck_hash
+from ddcb.seeding import derive_seed
+from ddcb.simulate import DEF_CONTROLLER, load_controller, run_shard
+
+FORMATS = ("round-robin", "swiss")
+BYE = ""
+CSV_FIELDS = ["round", "deck_one", "deck_two", "games", "wins", "losses", "ties"]
+
+
+def main():
+    args = parse_args()
+    decks = load_decks(args.decks)
+    out = args.out or args.decks / "results.csv"
+    try:
+        tournament = Tournament(
+            decks,
+            out,
+            format=args.format,
+            rounds=args.rounds,
+            games=args.games,
+            seed=args.seed,
+            controller=args.controller,
+            resume=args.resume,
+            overwrite=args.overwrite,
+            on_match=print_match,
+        )
+    except FileExistsError as e:
+        raise SystemExit(f"{e} Use --resume to continue or --overwrite to replace it.")
+    tournament.run(workers=args.workers)
+    print_standings(tournament.standings)
+    print(f"results in {out}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ddcb.tournament",
+        description="Play a directory of JSON decklists against each other.",
+    )
+    parser.add_argument("decks", type=Path, help="directory of JSON decklists")
+    parser.add_argument("-f", "--format", choices=FORMATS, default=FORMATS[0])
+    parser.add_argument(
+        "-r", "--rounds", type=int, default=None, help="swiss rounds, log2(decks)"
+    )
+    parser.add_argument("-n", "--games", type=int, default=100, help="per match")
+    parser.add_argument(
+        "-w", "--workers", type=int, default=None, help="defaults to cpu count"
+    )
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument(
+        "-c",
+        "--controller",
+        default=DEF_CONTROLLER,
+        help="controller class as 'module:ClassName'",
+    )
+    parser.add_argument(
+        "-o", "--out", type=Path, help="results CSV, defaults to results.csv in decks"
+    )
+    parser.add_argument(
+        "--resume", action="store_true", help="skip matches already in the CSV"
+    )
+    parser.add_argument(
+        "--overwrite", action="store_true", help="replace an existing results CSV"
+    )
+    return parser.parse_args(argv)
+
+
+def load_decks(directory: Path) -> t.Dict[str, t.List[str]]:
+    return {
+        path.stem: Deck.from_json(path).decklist
+        for path in sorted(Path(directory).glob("*.json"))
+    }
+
+
+def print_match(
+    tournament: "Tournament", pairing: "Pairing", wins: int, losses: int, ties: int
+):
+    # one line per finished match, with the leaders so far
+    played = f"[{len(tournament.results)}] round {pairing.round + 1}"
+    if pairing.two == BYE:
+        played += f" {pairing.one} has a bye"
+    else:
+        played += f" {pairing.one} vs {pairing.two} {wins}-{losses}-{ties}"
+    leaders = ranked(tournament.standings)[:3]
+    print(
+        f"{played}; leading: " + ", ".join(f"{s.name} {s.points:.1f}" for s in leaders)
+    )
+
+
+def print_standings(standings: t.Dict[str, "Standing"]):
+    print(
+        f"{'#':>3} {'deck':<30} {'points':>6} {'W-L-D':>9} "
+        f"{'games':>7} {'game %':>7}"
+    )
+    for rank, standing in enumerate(ranked(standings), start=1):
+        record = f"{standing.match_wins}-{standing.match_losses}-{standing.draws}"
+        print(
+            f"{rank:>3} {standing.name:<30} {standing.points:>6.1f} {record:>9} "
+            f"{standing.games:>7} {standing.game_score:>7.1%}"
+        )
+
+
+@dataclass
+class Standing:
+    name: str
+    match_wins: int = 0
+    match_losses: int = 0
+    draws: int = 0
+    games: int = 0
+    # ties count half
+    game_points: float = 0.0
+
+    @property
+    def points(self):
+        return self.match_wins + self.draws / 2
+
+    @property
+    def game_score(self):
+        return self.game_points / self.games if self.games else 0.0
+
+    def add(self, wins: int, losses: int, ties: int):
+        self.games += wins + losses + ties
+        self.game_points += wins + ties / 2
+        if wins > losses:
+            self.match_wins += 1
+        elif losses > wins:
+            self.match_losses += 1
+        else:
+            self.draws += 1
+
+
+def ranked(standings: t.Dict[str, Standing]) -> t.List[Standing]:
+    return sorted(standings.values(), key=lambda s: (-s.points, -s.game_score, s.name))
+
+
+class Pairing(t.NamedTuple):
+    round: int
+    one: str
+    two: str
+
+
+def add_result(
+    standings: t.Dict[str, Standing],
+    pairing: Pairing,
+    wins: int,
+    losses: int,
+    ties: int,
+):
+    if pairing.two == BYE:
+        standings[pairing.one].match_wins += 1
+        return
+    standings[pairing.one].add(wins, losses, ties)
+    standings[pairing.two].add(losses, wins, ties)
+
+
+def standings_of(
+    decks: t.Iterable[str], results: t.Dict[Pairing, t.Tuple[int, int, int]]
+) -> t.Dict[str, Standing]:
+    standings = {name: Standing(name) for name in decks}
+    for pairing, result in results.items():
+        add_result(standings, pairing, *result)
+    return standings
+
+
+class Tournament:
+    # Matches are work units on a process pool. At most a few per worker are
+    # in flight, so memory stays bounded however many matches are scheduled.
+    # Each finished match is appended to the CSV straight away, and --resume
+    # rebuilds the standings from it and skips what is already played.
+    def __init__(
+        self,
+        decks: t.Dict[str, t.List[str]],
+        out: Path,
+        format: str = "round-robin",
+        rounds: t.Optional[int] = None,
+        games: int = 100,
+        seed: int = 0,
+        controller: str = DEF_CONTROLLER,
+        resume: bool = False,
+        overwrite: bool = False,
+        on_match: t.Optional[t.Callable[..., None]] = None,
+    ):
+        if format not in FORMATS:
+            raise Exception(f"Unknown tournament format {format}.")
+        # played in canonical order, like the seeds below
+        self.decks = {name: canonical_decklist(d) for name, d in decks.items()}
+        self.out = Path(out)
+        self.format = format
+        self.rounds = rounds or max(1, (len(decks) - 1).bit_length())
+        self.games = games
+        self.seed = seed
+        self.controller = controller
+        # called as on_match(tournament, pairing, wins, losses, ties) after
+        # every match played in run()
+        self.on_match = on_match
+        # seeds follow the deck contents, not the file names
+        self.hashes = {name: int(deck_hash(d)[:16], 16) for name, d in decks.items()}
+
+        self.standings = standings_of(decks, {})
+        # one entry per match, not per game
+        self.results: t.Dict[Pairing, t.Tuple[int, int, int]] = {}
+        if resume and self.out.exists():
+            self.load()
+        elif self.out.exists() and not overwrite:
+            raise FileExistsError(f"{self.out} already exists.")
+        else:
+            self.out.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.out, "w", newline="") as fp:
+                csv.writer(fp).writerow(CSV_FIELDS)
+
+    def load(self):
+        with open(self.out, "r", newline="") as fp:
+            for row in csv.DictReader(fp):
+                if not row["ties"]:
+                    # cut off by the interruption
+                    continue
+                self.record(
+                    Pairing(int(row["round"]), row["deck_one"], row["deck_two"]),
+                    int(row["wins"]),
+                    int(row["losses"]),
+                    int(row["ties"]),
+                )
+        # rewrite without a partial last line, so appending starts clean
+        with open(self.out, "w", newline="") as fp:
+            writer = csv.writer(fp)
+            writer.writerow(CSV_FIELDS)
+            for pairing, (wins, losses, ties) in self.results.items():
+                writer.writerow([*pairing, wins + losses + ties, wins, losses, ties])
+
+    def run(self, workers: t.Optional[int] = None):
+        workers = workers or os.cpu_count() or 1
+        with shared_pool(workers) as pool:
+            if self.format == "round-robin":
+                pairings = (
+                    Pairing(0, one, two) for one, two in combinations(self.decks, 2)
+                )
+                self.play(pool, pairings, workers)
+            else:
+                for round in range(self.rounds):
+                    self.play(pool, self.swiss_pairings(round), workers)
+
+    def play(
+        self, pool: ProcessPoolExecutor, pairings: t.Iterable[Pairing], workers: int
+    ):
+        pending: t.Dict[Future, Pairing] = {}
+        todo = (p for p in pairings if p not in self.results)
+        # line buffered, every finished match reaches the file
+        with open(self.out, "a", newline="", buffering=1) as fp:
+            writer = csv.writer(fp)
+            for pairing in todo:
+                if pairing.two == BYE:
+                    self.finish(writer, pairing, 0, 0, 0)
+                    continue
+                pending[self.submit(pool, pairing)] = pairing
+                if len(pending) >= workers * 2:
+                    self.collect(writer, pending, FIRST_COMPLETED)
+            self.collect(writer, pending)
+
+    def submit(self, pool: ProcessPoolExecutor, pairing: Pairing) -> Future:
+        seed = derive_seed(
+            self.seed, pairing.round, self.hashes[pairing.one], self.hashes[pairing.two]
+        )
+        return pool.submit(
+            play_match,
+            self.decks[pairing.one],
+            self.decks[pairing.two],
+            self.controller,
+            self.games,
+            seed,
+        )
+
+    def collect(self, writer, pending: t.Dict[Future, Pairing], when=ALL_COMPLETED):
+        done, _ = wait(pending, return_when=when)
+        for future in done:
+            self.finish(writer, pending.pop(future), *future.result())
+
+    def finish(self, writer, pairing: Pairing, wins: int, losses: int, ties: int):
+        writer.writerow([*pairing, wins + losses + ties, wins, losses, ties])
+        self.record(pairing, wins, losses, ties)
+        if self.on_match is not None:
+            self.on_match(self, pairing, wins, losses, ties)
+
+    def record(self, pairing: Pairing, wins: int, losses: int, ties: int):
+        self.results[pairing] = (wins, losses, ties)
+        add_result(self.standings, pairing, wins, losses, ties)
+
+    def swiss_pairings(self, round: int) -> t.List[Pairing]:
+        # Decks with equal points meet, avoiding rematches where possible.
+        # Only depends on earlier rounds, so a resumed round pairs the same.
+        earlier = {p: r for p, r in self.results.items() if p.round < round}
+        met = {frozenset(p[1:]) for p in earlier}
+        unpaired = [s.name for s in ranked(standings_of(self.decks, earlier))]
+        pairings = []
+        if len(unpaired) % 2:
+            # the lowest ranked deck without a bye yet sits out
+            byes = {p.one for p in earlier if p.two == BYE}
+            bye = next((n for n in reversed(unpaired) if n not in byes), unpaired[-1])
+            unpaired.remove(bye)
+            pairings.append(Pairing(round, bye, BYE))
+        while unpaired:
+            one = unpaired.pop(0)
+            two = next(
+                (n for n in unpaired if frozenset((one, n)) not in met), unpaired[0]
+            )
+            unpaired.remove(two)
+            pairings.append(Pairing(round, one, two))
+        return pairings
+
+
+def play_match(
+    decklist_one: t.List[str],
+    decklist_two: t.List[str],
+    controller: str,
+    games: int,
+    seed: int,
+) -> t.Tuple[int, int, int]:
+    result = run_shard(
+        decklist_one, decklist_two, load_controller(controller), 0, games, seed
+    )
+    return result.wins, result.losses, result.ties
+
+
+if __name__ == "__main__":
+    main()
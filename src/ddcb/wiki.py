@@ -4,7 +4,7 @@ import typing as t
 import requests
 from bs4 import BeautifulSoup
 
-from . import PKG_DATA
+from . import PKG_DATA, card_db
 from . import dc_json as json
 from .card import Attack, Card, EffectAttack, UnitCard
 
@@ -12,6 +12,7 @@ from .card import Attack, Card, EffectAttack, UnitCard
 def main():
     cards = list(get_wiki_cards())
     write_wiki_cards(cards)
+    card_db.build()
 
 
 def get_wiki_cards():
@@ -0,0 +1,12 @@
+import random
+import typing as t
+
+import pytest
+
+from ddcb.field import Deck
+
+
+@pytest.fixture
+def decklists() -> t.List[t.List[str]]:
+    rng = random.Random(0)
+    return [Deck.from_random(rng).decklist for _ in range(2)]
@@ -0,0 +1,40 @@
+import typing as t
+from collections import Counter
+
+from ddcb.base_controller import BaseController, RandomController
+from ddcb.battle import Battle
+from ddcb.card import CardList, Level, UnitCard
+from ddcb.field import Deck, Field
+from ddcb.player import Player
+
+
+def make_battle(
+    decklist_one: t.List[str],
+    decklist_two: t.List[str],
+    controller: t.Type[BaseController] = RandomController,
+) -> Battle:
+    return Battle(
+        Player("one", Deck.from_names(decklist_one), controller()),
+        Player("two", Deck.from_names(decklist_two), controller()),
+    )
+
+
+def units() -> t.List[UnitCard]:
+    return [c for c in CardList().cards.values() if isinstance(c, UnitCard)]
+
+
+def non_units() -> t.List[str]:
+    return [c.name for c in CardList().cards.values() if not isinstance(c, UnitCard)]
+
+
+def assert_indexes(field: Field):
+    # the incremental hand indexes and DP total against values recomputed
+    # from the hand and the DP stack
+    hand_units = [card for card in field.hand if isinstance(card, UnitCard)]
+    assert field.hand_units == hand_units
+    assert all(a is b for a, b in zip(field.hand_units, hand_units))
+    assert field.hand_levels == {
+        level: sum(u.level == level for u in hand_units) for level in Level
+    }
+    assert field.hand_names == Counter(card.name for card in field.hand)
+    assert field.dp.value == sum(unit.pp for unit in field.dp.stack)
@@ -0,0 +1,9 @@
+import random
+
+from ddcb.batch_battle import check_against_scalar
+from ddcb.field import Deck
+
+
+def test_batch_battle_matches_scalar():
+    decklists = [Deck.from_random(random.Random(seed)).decklist for seed in (1, 2)]
+    assert check_against_scalar(*decklists, games=2000, seed=0)
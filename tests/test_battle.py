@@ -0,0 +1,90 @@
+from ddcb import events
+from ddcb.base_controller import BaseController
+from ddcb.battle import Battle, BattleResult
+from ddcb.card import Level
+from ddcb.field import Deck, Field
+from ddcb.player import Player
+from ddcb.seeding import derive_seed
+
+from helpers import make_battle, non_units, units
+
+
+def test_seeded_run_gives_a_fixed_result(decklists):
+    battle = make_battle(*decklists)
+    assert battle.battle(first=0, seed=1) == BattleResult.Win
+    assert battle.turn == 4
+
+    wins = sum(
+        battle.battle(first=game % 2, seed=derive_seed(7, game)) == BattleResult.Win
+        for game in range(200)
+    )
+    assert wins == 119
+
+
+def test_next_decision_plays_the_same_games_as_run(decklists):
+    for game in range(50):
+        seed = derive_seed(3, game)
+        battle = make_battle(*decklists)
+        expected = battle.battle(first=game % 2, seed=seed)
+        turns = battle.turn
+
+        battle = make_battle(*decklists)
+        battle.seed(seed)
+        battle.reset(first=game % 2)
+        while (seat := battle.next_decision()) is not None:
+            spec = battle.STEPS[battle.step]
+            battle.decide(spec.ask(battle.players[seat].controller, battle.options))
+        assert (battle.result, battle.turn) == (expected, turns)
+
+
+def test_running_out_of_cards_without_a_unit_loses():
+    # no units at all: every hand is mulliganed until the deck is empty
+    decklist = non_units()[: Deck.SIZE]
+    battle = make_battle(decklist, decklist, BaseController)
+    mulligans = []
+    battle.events.subscribe(mulligans.append, events.Mulligan)
+    assert battle.battle(first=0, seed=0) == BattleResult.Loss
+    assert battle.turn == 1
+    assert len(battle.fields[0].deck) == 0
+    assert all(m.auto for m in mulligans)
+
+
+def test_a_hand_without_units_is_mulliganed():
+    # the top of the deck, drawn first, holds no units
+    unit_names = [u.name for u in units()[: Deck.SIZE - 4]]
+    decklist = unit_names + non_units()[:4]
+    battle = Battle(
+        Player("one", Deck.from_names(decklist), BaseController()),
+        Player("two", Deck.from_names(decklist), BaseController()),
+    )
+    mulligans = []
+    battle.events.subscribe(mulligans.append, events.Mulligan)
+    battle.reset(first=0)
+    for field in battle.fields:
+        field.deck.reset()
+    battle.next_decision()
+
+    assert [(m.seat, m.auto) for m in mulligans] == [(0, True)]
+    assert {card.name for card in mulligans[0].cards} == set(non_units()[:4])
+    assert battle.fields[0].has_unit_in_hand()
+
+
+def test_evolution_keeps_the_larger_hp():
+    rookie = next(u for u in units() if u.level == Level.ROOKIE)
+    champion = next(u for u in units() if u.level == Level.CHAMPION)
+    ultimate = next(u for u in units() if u.level == Level.ULTIMATE)
+    field = Field(Deck.from_names([rookie.name, champion.name, ultimate.name]))
+    field.set_hand([rookie, champion, ultimate])
+    field.play_unit(rookie)
+
+    # a healthy unit keeps its HP when the new card has less
+    field.unit.hp = champion.hp + 100
+    field.evolve_unit(champion)
+    assert field.unit.card is champion
+    assert field.unit.hp == champion.hp + 100
+
+    # a damaged unit gets the new card's HP
+    field.unit.hp = 10
+    field.evolve_unit(ultimate)
+    assert field.unit.hp == ultimate.hp
+    assert field.discard_pile == [rookie, champion]
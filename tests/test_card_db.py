@@ -0,0 +1,49 @@
+import json
+
+from ddcb import card_db
+from ddcb.card import DEF_CARD_LIST_FILE, CardFactory, CardList
+
+
+def test_compiled_cards_decode_like_the_json():
+    cards = list(CardFactory.from_json(DEF_CARD_LIST_FILE))
+    data = card_db.encode(cards, card_db.hash_file(DEF_CARD_LIST_FILE))
+    assert card_db.decode(data) == cards
+
+
+def test_is_stale(tmp_path):
+    json_path = tmp_path / "cards.json"
+    db_path = tmp_path / "cards.bin"
+    json_path.write_bytes(DEF_CARD_LIST_FILE.read_bytes())
+    assert card_db.is_stale(db_path, json_path)
+
+    card_db.build(json_path, db_path)
+    assert not card_db.is_stale(db_path, json_path)
+
+    # edited card data
+    json_path.write_bytes(json_path.read_bytes() + b"\n")
+    assert card_db.is_stale(db_path, json_path)
+
+    card_db.build(json_path, db_path)
+    db_path.write_bytes(db_path.read_bytes()[: card_db.HEADER.size - 1])
+    assert card_db.is_stale(db_path, json_path)
+
+
+def test_card_list_falls_back_to_json_when_the_database_is_stale(tmp_path):
+    json_path = tmp_path / "cards.json"
+    db_path = json_path.with_suffix(".bin")
+    cards = json.loads(DEF_CARD_LIST_FILE.read_text())
+
+    # a database built from older card data, one card short
+    json_path.write_text(json.dumps(cards[:-1]))
+    card_db.build(json_path, db_path)
+    json_path.write_text(json.dumps(cards))
+
+    card_list = object.__new__(CardList)
+    card_list.load_from_path(json_path)
+    assert isinstance(card_list.cards, dict)
+    assert len(card_list.cards) == len(cards)
+
+    card_db.build(json_path, db_path)
+    card_list.load_from_path(json_path)
+    assert isinstance(card_list.cards, card_db.CompiledCards)
+    assert len(card_list.cards) == len(cards)
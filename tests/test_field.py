@@ -0,0 +1,38 @@
+import random
+
+from ddcb.field import Deck, Field
+
+from helpers import assert_indexes, non_units, units
+
+
+def test_hand_indexes_follow_random_play():
+    # duplicates on purpose, equal cards must come out of the indexes one
+    # at a time
+    rng = random.Random(0)
+    pool = [u.name for u in rng.sample(units(), 8)] + rng.sample(non_units(), 4)
+    field = Field(Deck.from_names([rng.choice(pool) for _ in range(Deck.SIZE)], rng))
+
+    for _ in range(200):
+        field.reset()
+        field.deck.shuffle()
+        for _ in range(40):
+            op = rng.randrange(8)
+            if op == 0:
+                field.draw(rng.randint(1, 3))
+            elif op == 1 and field.hand:
+                field.discard(rng.randrange(len(field.hand)))
+            elif op == 2 and rng.random() < 0.2:
+                field.discard_hand()
+            elif op == 3 and field.hand_units and field.unit is None:
+                field.play_unit(rng.choice(field.hand_units))
+            elif op == 4 and field.hand_units:
+                field.boost_dp(rng.choice(field.hand_units).name)
+            elif op == 5 and field.unit is not None:
+                targets = field.get_evolution_targets()
+                if targets:
+                    field.evolve_unit(rng.choice(targets))
+            elif op == 6 and field.dp.stack:
+                field.dp.pop()
+            elif op == 7 and field.hand:
+                field.pop_card_from_hand(rng.choice(field.hand).name)
+            assert_indexes(field)
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from ddcb.card import DEF_CARD_LIST_FILE, CardFactory
+from ddcb.card_table import CardTable
+from ddcb.kill_matrix import HP_STEP, SLOTS, KillMatrix
+
+
+@pytest.fixture(scope="module")
+def matrix():
+    return KillMatrix.build(CardTable.from_card_list())
+
+
+def test_build_from_card_list_matches_json(matrix):
+    table = CardTable.from_cards(CardFactory.from_json(DEF_CARD_LIST_FILE))
+    expected = KillMatrix.build(table)
+    for name in ("damage", "hits", "hits_at"):
+        assert np.array_equal(getattr(matrix, name), getattr(expected, name))
+
+
+def test_hits_to_kill_many_matches_single(matrix):
+    # HP up to twice the largest card HP, past the end of hits_at
+    rng = np.random.default_rng(0)
+    size = 2000
+    attackers = rng.integers(0, len(matrix.damage), size)
+    slots = rng.integers(0, len(SLOTS), size)
+    hps = rng.integers(1, 2 * (matrix.hits_at.shape[-1] - 1) * HP_STEP, size)
+    many = matrix.hits_to_kill_many(attackers, slots, hps)
+    single = [matrix.hits_to_kill(*args) for args in zip(attackers, slots, hps)]
+    assert many.tolist() == single
+
+
+def test_load_caches(tmp_path, matrix):
+    built = KillMatrix.load(cache_dir=tmp_path)
+    cached = KillMatrix.load(cache_dir=tmp_path)
+    assert built.path == cached.path and built.path.exists()
+    assert np.array_equal(cached.hits_at, matrix.hits_at)
@@ -0,0 +1,80 @@
+import random
+
+import pytest
+
+from ddcb.base_controller import RandomController
+from ddcb.matchup_cache import (
+    MatchupCache,
+    canonical_deck,
+    canonical_decklist,
+    deck_hash,
+)
+from ddcb.simulate import simulate
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = MatchupCache(tmp_path / "matchups.db")
+    yield cache
+    cache.close()
+
+
+def counts(result):
+    return result.wins, result.losses, result.ties
+
+
+def direct(decklists, games, first_game=0):
+    one, two = (canonical_decklist(d) for d in decklists)
+    return simulate(
+        one, two, RandomController, games, workers=1, seed=3, first_game=first_game
+    )
+
+
+def run(cache, decklists, games, first_game=0):
+    return cache.simulate(
+        *decklists, RandomController, games, seed=3, workers=1, first_game=first_game
+    )
+
+
+def test_a_cache_hit_returns_the_stored_games(cache, decklists):
+    stored = run(cache, decklists, 200)
+    assert cache.simulated == 200
+    assert counts(stored) == counts(direct(decklists, 200))
+
+    hit = run(cache, decklists, 200)
+    assert cache.simulated == 0
+    assert counts(hit) == counts(stored)
+
+
+def test_only_the_gaps_of_a_range_are_simulated(cache, decklists):
+    run(cache, decklists, 100)
+    run(cache, decklists, 100, first_game=200)
+
+    result = run(cache, decklists, 400)
+    # [100, 200) and [300, 400)
+    assert cache.simulated == 200
+    assert counts(result) == counts(direct(decklists, 400))
+
+    # stored ranges inside the request are reused, [100, 300) is cached
+    assert counts(run(cache, decklists, 200, first_game=100)) == counts(
+        direct(decklists, 200, first_game=100)
+    )
+    assert cache.simulated == 0
+    # a stored range only partly inside is not, [200, 250) is played again
+    run(cache, decklists, 150, first_game=100)
+    assert cache.simulated == 50
+
+
+def test_permuted_decklists_are_one_deck(cache, decklists):
+    one, two = decklists
+    shuffled = list(one)
+    random.Random(5).shuffle(shuffled)
+    respelled = [name.upper() for name in one]
+    assert canonical_deck(shuffled) == canonical_deck(one)
+    assert deck_hash(shuffled) == deck_hash(one) == deck_hash(respelled)
+    assert deck_hash(one) != deck_hash(two)
+
+    # and play the same games, cached or not
+    assert counts(run(cache, [shuffled, two], 200)) == counts(direct([one, two], 200))
+    assert counts(run(cache, [one, two], 200)) == counts(direct([one, two], 200))
+    assert cache.simulated == 0
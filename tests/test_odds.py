@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from ddcb.card_table import CardTable
+from ddcb.field import Deck
+from ddcb.odds import DrawOdds, sample_openings
+from helpers import non_units, units
+
+
+@pytest.fixture(scope="module")
+def table():
+    return CardTable.from_card_list()
+
+
+def test_score_matches_sampled_openings(table, decklists):
+    # the random decks rarely mulligan, a deck with 3 units often does
+    few_units = [u.name for u in units()[:3]] + non_units()[:27]
+    odds = DrawOdds()
+    decks = [Deck.from_names(decklist) for decklist in decklists + [few_units]]
+    scores = odds.score(table, table.decks_ids(decks))
+    for i, deck in enumerate(decks):
+        opening, mulligans = sample_openings(deck, 20_000)
+        assert scores["opening unit"][i] == pytest.approx(opening, abs=0.02)
+        assert scores["opening mulligans"][i] == pytest.approx(mulligans, abs=0.05)
+
+
+def test_expected_mulligans_edges():
+    odds = DrawOdds()
+    # a unitless deck mulligans until it runs out, a unit-only deck never
+    assert odds.expected_mulligans(np.array([0, Deck.SIZE])).tolist() == [
+        len(odds.mulligan_draws),
+        0.0,
+    ]
+
+
+def test_score_rejects_other_deck_sizes(table, decklists):
+    ids = table.decks_ids([Deck.from_names(decklists[0])])
+    with pytest.raises(Exception, match="30 card decks, not 20"):
+        DrawOdds().score(table, ids[:, :20])
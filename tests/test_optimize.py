@@ -0,0 +1,34 @@
+import pytest
+
+from ddcb.optimize import Optimizer, OptimizerConfig, load_pool
+
+
+def config(decklists, generations: int) -> OptimizerConfig:
+    return OptimizerConfig(
+        gauntlet=decklists[:1],
+        pool=load_pool(None),
+        population=4,
+        generations=generations,
+        games=4,
+    )
+
+
+def test_config_rejects_no_games(decklists):
+    with pytest.raises(Exception, match="at least 1 game"):
+        OptimizerConfig(gauntlet=decklists, pool=load_pool(None), games=0)
+
+
+def test_resume_continues_like_an_uninterrupted_run(tmp_path, decklists):
+    straight = Optimizer(config(decklists, 2))
+    straight.run(workers=2)
+
+    checkpoint = tmp_path / "checkpoint.json"
+    Optimizer(config(decklists, 1)).run(workers=2, checkpoint=checkpoint)
+    resumed = Optimizer.resume(checkpoint, generations=2)
+    assert resumed.generation == 1
+    resumed.run(workers=2, checkpoint=checkpoint)
+
+    assert resumed.generation == straight.generation
+    assert resumed.population == straight.population
+    assert resumed.fitness == straight.fitness
+    assert resumed.rng.getstate() == straight.rng.getstate()
@@ -0,0 +1,30 @@
+import dataclasses
+
+from ddcb.replay import Replay, check_replays, record_games, validate
+
+
+def test_recorded_replays_check(tmp_path, decklists):
+    paths = record_games(*decklists, tmp_path, games=20, seed=3)
+    assert len(paths) == 20
+    assert check_replays(paths, workers=1) == []
+
+
+def test_corrupted_replays_are_reported(tmp_path, decklists):
+    path = record_games(*decklists, tmp_path, games=1, seed=3)[0]
+    rec = Replay.read(path)
+
+    one, two = rec.decks
+    unknown_card = dataclasses.replace(rec, decks=((60000, *one[1:]), two))
+    assert "Unknown card id" in validate(unknown_card)
+
+    assert validate(dataclasses.replace(rec, choices=rec.choices[:-1]))
+    assert validate(dataclasses.replace(rec, choices=rec.choices + b"\x00"))
+    assert validate(dataclasses.replace(rec, choices=b"\xff" * len(rec.choices)))
+    assert validate(dataclasses.replace(rec, turns=rec.turns + 1))
+
+    path.write_bytes(path.read_bytes()[:-1])
+    assert check_replays([path], workers=1)
+
+    bad_version = tmp_path / "bad.replay"
+    bad_version.write_bytes(b"DDRP\xff" + rec.to_bytes()[5:])
+    assert check_replays([bad_version], workers=1)
@@ -0,0 +1,52 @@
+import asyncio
+import json
+
+import pytest
+
+from ddcb.base_controller import BaseController
+from ddcb.field import Deck
+from ddcb.server import MatchServer, load_test
+
+
+async def exchange(path, line: bytes) -> dict:
+    server = await MatchServer(BaseController, timeout=None).start(unix=path)
+    try:
+        reader, writer = await asyncio.open_unix_connection(path)
+        writer.write(line + b"\n")
+        await writer.drain()
+        reply = json.loads(await reader.readline())
+        writer.close()
+        await writer.wait_closed()
+        return reply
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        b"[1, 2]",
+        b"not json",
+        b'{"type": "choice"}',
+        b'{"type": "new", "deck": 5}',
+        b'{"type": "new", "deck": ["Agumon"]}',
+        json.dumps({"type": "new", "deck": [1] * Deck.SIZE}).encode(),
+        json.dumps({"type": "new", "deck": ["Nothing"] * Deck.SIZE}).encode(),
+    ],
+)
+def test_bad_messages_get_an_error(tmp_path, message):
+    reply = asyncio.run(exchange(tmp_path / "ddcb.sock", message))
+    assert reply["type"] == "error"
+
+
+def test_a_new_match_with_a_deck_asks_for_decisions(tmp_path, decklists):
+    message = json.dumps({"type": "new", "deck": decklists[0]}).encode()
+    reply = asyncio.run(exchange(tmp_path / "ddcb.sock", message))
+    assert reply["type"] == "decision"
+
+
+def test_load_test_plays_every_match():
+    stats = asyncio.run(load_test(50, 10))
+    assert stats.matches == 50
+    assert stats.decisions > 0
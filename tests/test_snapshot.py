@@ -0,0 +1,44 @@
+from ddcb.battle import Battle
+from ddcb.seeding import derive_seed
+
+from helpers import assert_indexes, make_battle
+
+
+def play_out(battle: Battle) -> list:
+    # every decision's state and the choice made, to the end of the game
+    states = []
+    while (seat := battle.next_decision()) is not None:
+        spec = battle.STEPS[battle.step]
+        choice = spec.ask(battle.players[seat].controller, battle.options)
+        states.append((battle.snapshot(), choice))
+        battle.decide(choice)
+    return states + [(battle.snapshot(), battle.result)]
+
+
+def test_restore_continues_the_same_game(decklists):
+    for game in range(20):
+        battle = make_battle(*decklists)
+        battle.seed(derive_seed(5, game))
+        battle.reset(first=game % 2)
+        for _ in range(game % 7):
+            seat = battle.next_decision()
+            if seat is None:
+                break
+            spec = battle.STEPS[battle.step]
+            battle.decide(spec.ask(battle.players[seat].controller, battle.options))
+        battle.next_decision()
+
+        state = battle.snapshot()
+        rngs = [rng.getstate() for rng in battle.rngs]
+        expected = play_out(battle)
+
+        # restored into another battle whose own game is somewhere else
+        other = make_battle(*decklists)
+        other.battle(first=0, seed=derive_seed(6, game))
+        for rng, rng_state in zip(other.rngs, rngs):
+            rng.setstate(rng_state)
+        other.restore(state)
+        assert other.snapshot() == state
+        for field in other.fields:
+            assert_indexes(field)
+        assert play_out(other) == expected